@@ -0,0 +1,81 @@
+"""
+Benchmark converting list-of-dict fragments into Arrow record batches.
+
+Synthetic fragments of JSON-native records (with nested and empty structs) are
+converted the way `_persist_parquet` used to, sanitising empty structs in
+Python and dumping every record through a pydantic TypeAdapter before
+`pa.RecordBatch.from_pylist`, and with the single-pass `to_record_batch`.
+
+Usage:
+    python -m benchmarks.columnar_conversion --rows 1000000 --fragment-rows 100000
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import time
+from typing import Any
+import pyarrow as pa
+from pydantic import TypeAdapter
+from mad_prefect.data_assets.serialization import to_record_batch
+
+_type_adapter: TypeAdapter = TypeAdapter(Any)
+
+
+def sanitize_empty_structs(data):
+    if isinstance(data, dict):
+        if not data:
+            return None
+        return {key: sanitize_empty_structs(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [sanitize_empty_structs(item) for item in data]
+    return data
+
+
+def previous_to_record_batch(data: object) -> pa.RecordBatch:
+    # Three traversals: sanitise, TypeAdapter dump, then Arrow's own conversion
+    return pa.RecordBatch.from_pylist(
+        _type_adapter.dump_python(sanitize_empty_structs(data))
+    )
+
+
+def make_fragment(start: int, rows: int) -> list[dict]:
+    created = datetime(2024, 1, 1)
+    return [
+        {
+            "id": i,
+            "name": f"customer {i}",
+            "amount": i * 0.5,
+            "created": created + timedelta(seconds=i),
+            "tags": ["a", "b"] if i % 2 else [],
+            "address": {"city": "Perth", "postcode": str(6000 + i % 100)},
+            "extra": {},
+        }
+        for i in range(start, start + rows)
+    ]
+
+
+def run(rows: int, fragment_rows: int):
+    fragments = [
+        make_fragment(start, min(fragment_rows, rows - start))
+        for start in range(0, rows, fragment_rows)
+    ]
+
+    for name, convert in [
+        ("previous", previous_to_record_batch),
+        ("single-pass", to_record_batch),
+    ]:
+        start = time.perf_counter()
+        converted = sum(convert(fragment).num_rows for fragment in fragments)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>11}: {converted} rows in {elapsed:.3f}s ({converted / elapsed:,.0f} rows/s)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--fragment-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.rows, args.fragment_rows)
@@ -1,5 +1,6 @@
 from mad_prefect.data_assets.asset_decorator import (
     AssetDecorator,
+    ARTIFACT_COMPRESSIONS,
     ARTIFACT_FILE_TYPES,
     ASSET_METADATA_LOCATION,
 )
@@ -0,0 +1,92 @@
+import posixpath
+from mad_prefect.data_assets.asset_decorator import (
+    ARTIFACT_COMPRESSIONS,
+    ARTIFACT_FILE_TYPES,
+)
+
+# File extensions for each artifact filetype, JSON artifacts are newline delimited
+# and Arrow artifacts are Arrow IPC (Feather V2) files
+FILETYPE_EXTENSIONS: dict[str, ARTIFACT_FILE_TYPES] = {
+    "json": "json",
+    "jsonl": "json",
+    "parquet": "parquet",
+    "csv": "csv",
+    "arrow": "arrow",
+    "feather": "arrow",
+    "ipc": "arrow",
+}
+
+COMPRESSION_EXTENSIONS: dict[str, ARTIFACT_COMPRESSIONS] = {
+    "gz": "gzip",
+    "zst": "zstd",
+}
+
+# Filetypes which can be wrapped in a compressed stream, Parquet compresses its pages
+# and Arrow IPC files are memory-mapped when they're read
+COMPRESSIBLE_FILETYPES: set[str] = {"json", "csv"}
+
+
+def parse_artifact_suffix(
+    path: str,
+) -> tuple[ARTIFACT_FILE_TYPES, ARTIFACT_COMPRESSIONS | None]:
+    """
+    Get the filetype and compression of an artifact from its extensions.
+
+    e.g. `customers.json` is `("json", None)` and `customers.jsonl.zst` is
+    `("json", "zstd")`.
+    """
+    stem, extension = posixpath.splitext(path)
+    extension = extension.lstrip(".").lower()
+    compression = COMPRESSION_EXTENSIONS.get(extension)
+
+    if compression:
+        stem, extension = posixpath.splitext(stem)
+        extension = extension.lstrip(".").lower()
+
+    filetype = FILETYPE_EXTENSIONS.get(extension)
+
+    if not filetype:
+        raise ValueError(f"Unsupported file type: {extension}")
+
+    if compression and filetype not in COMPRESSIBLE_FILETYPES:
+        raise ValueError(
+            f"Unsupported compression for {filetype} artifacts: {compression}. "
+            "Parquet artifacts are compressed with write_parquet_options."
+        )
+
+    return filetype, compression
+
+
+def artifact_suffix(
+    filetype: ARTIFACT_FILE_TYPES, compression: ARTIFACT_COMPRESSIONS | None = None
+) -> str:
+    """Build the extensions of an artifact, e.g. `.json.gz`."""
+    if not compression:
+        return f".{filetype}"
+
+    if filetype not in COMPRESSIBLE_FILETYPES:
+        raise ValueError(
+            f"Unsupported compression for {filetype} artifacts: {compression}. "
+            "Parquet artifacts are compressed with write_parquet_options."
+        )
+
+    extension = next(e for e, c in COMPRESSION_EXTENSIONS.items() if c == compression)
+    return f".{filetype}.{extension}"
+
+
+def split_artifact_suffixes(path: str) -> tuple[str, list[str]]:
+    """
+    Split a result path into its base path and the suffix of each result artifact.
+
+    e.g. `data/customers.json.gz|parquet` is `("data/customers", [".json.gz", ".parquet"])`.
+    """
+    first, *others = path.split("|")
+    stem, extension = posixpath.splitext(first)
+
+    if extension.lstrip(".").lower() in COMPRESSION_EXTENSIONS:
+        stem, filetype_extension = posixpath.splitext(stem)
+        extension = f"{filetype_extension}{extension}"
+
+    suffixes = [extension] + [o if o.startswith(".") else f".{o}" for o in others]
+
+    return stem, suffixes
@@ -5,10 +5,17 @@ from typing import Any, Callable, Literal, ParamSpec, TypeVar
 from mad_prefect.data_assets.options import (
     ReadJsonOptions,
     ReadCSVOptions,
+    WriteParquetOptions,
 )
+from mad_prefect.data_assets.serialization import (
+    JSON_ENCODERS,
+    SERIALIZATION_EXECUTORS,
+)
+from mad_prefect.duckdb import DuckDBSettings
 
 ASSET_METADATA_LOCATION = os.getenv("ASSET_METADATA_LOCATION", "_asset_metadata")
-ARTIFACT_FILE_TYPES = Literal["parquet", "json", "csv"]
+ARTIFACT_FILE_TYPES = Literal["parquet", "json", "csv", "arrow"]
+ARTIFACT_COMPRESSIONS = Literal["gzip", "zstd"]
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +36,17 @@ class AssetDecorator:
         read_json_options: ReadJsonOptions | None = None,
         read_csv_options: ReadCSVOptions | None = None,
         cache_expiration: datetime.timedelta | None = None,
+        max_in_flight_persists: int = 1,
+        serialization_executor: SERIALIZATION_EXECUTORS | None = None,
+        duckdb_settings: DuckDBSettings | None = None,
+        target_batch_bytes: int | None = None,
+        json_encoder: JSON_ENCODERS | None = None,
+        schema_inference_batches: int | None = None,
+        write_parquet_options: WriteParquetOptions | None = None,
+        artifact_compression: ARTIFACT_COMPRESSIONS | None = None,
+        fragment_target_rows: int | None = None,
+        fragment_target_bytes: int | None = None,
+        materialization_lock: bool = True,
     ):
         # Prevent a circular reference as it references the env variable
         from mad_prefect.data_assets.data_asset import DataAsset
@@ -47,6 +65,17 @@ class AssetDecorator:
             read_json_options=read_json_options,
             read_csv_options=read_csv_options,
             cache_expiration=cache_expiration,
+            max_in_flight_persists=max_in_flight_persists,
+            serialization_executor=serialization_executor,
+            duckdb_settings=duckdb_settings,
+            target_batch_bytes=target_batch_bytes,
+            json_encoder=json_encoder,
+            schema_inference_batches=schema_inference_batches,
+            write_parquet_options=write_parquet_options,
+            artifact_compression=artifact_compression,
+            fragment_target_rows=fragment_target_rows,
+            fragment_target_bytes=fragment_target_bytes,
+            materialization_lock=materialization_lock,
         )
 
         def decorator(fn: Callable[P, T]) -> DataAsset[P, T]:
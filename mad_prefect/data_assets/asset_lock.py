@@ -0,0 +1,218 @@
+"""Leases which let one process at a time materialize an asset.
+
+A lease is a small JSON file next to the asset's manifest in
+`ASSET_METADATA_LOCATION`. The holder renews it every third of its TTL while the
+asset runs. A lease which isn't renewed before it expires, e.g. because its
+worker crashed, is taken over by the next process waiting for it.
+
+Filesystems have no portable atomic create, so a lease is written and read back
+after `ASSET_LOCK_SETTLE_SECONDS`. Of the processes writing a lease at the same
+moment, only the last writer reads back its own lease and holds the lock.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import socket
+import time
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from mad_prefect.data_assets.asset_decorator import ASSET_METADATA_LOCATION
+from mad_prefect.filesystems import get_fs
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "AssetLease",
+    "AssetLock",
+]
+
+LEASE_FILENAME = "lease.json"
+
+DEFAULT_LEASE_TTL = timedelta(
+    seconds=float(os.getenv("ASSET_LOCK_TTL_SECONDS", "300"))
+)
+DEFAULT_POLL_INTERVAL = float(os.getenv("ASSET_LOCK_POLL_SECONDS", "1"))
+DEFAULT_SETTLE_SECONDS = float(os.getenv("ASSET_LOCK_SETTLE_SECONDS", "0.05"))
+
+
+class AssetLease(BaseModel):
+    """The process holding the lock on an asset, until `expires_at`."""
+
+    owner: str
+    asset_name: str
+    asset_id: str
+    acquired_at: datetime
+    expires_at: datetime
+
+    def expired(self) -> bool:
+        return self.expires_at <= datetime.now(timezone.utc)
+
+
+class AssetLock:
+    """
+    A lease on materializing an asset, shared by every process using the same
+    filesystem. Use it as an async context manager, `waited` tells whether another
+    process held the lease when it was requested.
+    """
+
+    def __init__(
+        self,
+        asset_name: str,
+        asset_id: str,
+        *,
+        ttl: timedelta | None = None,
+        poll_interval: float | None = None,
+        settle_seconds: float | None = None,
+    ):
+        self.asset_name = asset_name
+        self.asset_id = asset_id
+        self.ttl = ttl or DEFAULT_LEASE_TTL
+        self.poll_interval = (
+            DEFAULT_POLL_INTERVAL if poll_interval is None else poll_interval
+        )
+        self.settle_seconds = (
+            DEFAULT_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:12]}"
+
+        self.waited = False
+        # Set when another process took the lease over while it was held
+        self.lost = False
+        self._acquired_at: datetime | None = None
+        self._heartbeat: asyncio.Task | None = None
+
+    @property
+    def path(self) -> str:
+        return f"{ASSET_METADATA_LOCATION}/asset_name={self.asset_name}/asset_id={self.asset_id}/{LEASE_FILENAME}"
+
+    async def __aenter__(self) -> AssetLock:
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+    async def read_lease(self) -> AssetLease | None:
+        """The lease currently stored for the asset, if any."""
+        fs = await get_fs()
+
+        try:
+            return AssetLease.model_validate_json(await fs.read_path(self.path))
+        except (ValueError, FileNotFoundError):
+            # Missing, or deleted or rewritten while it was read
+            return None
+
+    async def acquire(self, timeout: float | None = None):
+        """
+        Wait until the lease is free or expired, then take it. Raises a
+        `TimeoutError` when it's still held after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            holder = await self._holder()
+
+            if holder is None:
+                if await self._claim():
+                    break
+
+                # Another process claimed it at the same moment, it's the holder now
+                holder = await self.read_lease()
+
+            owner = holder.owner if holder else "another process"
+
+            if not self.waited:
+                logger.info(
+                    f"Asset '{self.asset_name}' is being materialized by {owner}, waiting for its lease to be released."
+                )
+
+            self.waited = True
+
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Timed out waiting for the lease on asset '{self.asset_name}' held by {owner}"
+                )
+
+            await asyncio.sleep(self.poll_interval)
+
+        logger.debug(f"Acquired the lease on asset '{self.asset_name}' ({self.owner})")
+        self._heartbeat = asyncio.create_task(self._renew())
+
+    async def release(self):
+        """Stop renewing the lease and delete it, unless another process took it over."""
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+
+        lease = await self.read_lease()
+
+        if lease and lease.owner == self.owner:
+            fs = await get_fs()
+            await fs.delete_path(self.path)
+            logger.debug(f"Released the lease on asset '{self.asset_name}'")
+
+    async def _holder(self) -> AssetLease | None:
+        """The lease of another process holding the lock, None when it's free."""
+        lease = await self.read_lease()
+
+        if lease is None or lease.owner == self.owner:
+            return None
+
+        if lease.expired():
+            logger.warning(
+                f"Taking over the expired lease on asset '{self.asset_name}' from {lease.owner}."
+            )
+            return None
+
+        return lease
+
+    async def _claim(self) -> bool:
+        self._acquired_at = datetime.now(timezone.utc)
+        await self._write_lease()
+
+        # Another process may have written its lease at the same moment, the last
+        # write wins
+        await asyncio.sleep(self.settle_seconds)
+        lease = await self.read_lease()
+
+        return lease is not None and lease.owner == self.owner
+
+    async def _write_lease(self):
+        now = datetime.now(timezone.utc)
+        lease = AssetLease(
+            owner=self.owner,
+            asset_name=self.asset_name,
+            asset_id=self.asset_id,
+            acquired_at=self._acquired_at or now,
+            expires_at=now + self.ttl,
+        )
+        fs = await get_fs()
+        await fs.write_path(self.path, lease.model_dump_json().encode())
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.ttl.total_seconds() / 3)
+
+            try:
+                lease = await self.read_lease()
+
+                if lease is None or lease.owner != self.owner:
+                    self.lost = True
+                    logger.warning(
+                        f"The lease on asset '{self.asset_name}' was taken over by {lease.owner if lease else 'another process'}, it's no longer renewed."
+                    )
+                    return
+
+                await self._write_lease()
+            except Exception:  # pragma: no cover - surfaced via log
+                # A failed renewal is retried, the lease lasts a full TTL
+                logger.exception(
+                    f"Failed to renew the lease on asset '{self.asset_name}'"
+                )
@@ -2,17 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timezone
 from enum import Enum
+import io
 import logging
-from typing import Iterable, Literal, Sequence
+from typing import Iterable, Literal, Mapping, Sequence
+import weakref
 
 import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pydantic import BaseModel, Field, model_validator
 
 from mad_prefect.data_assets.asset_decorator import ASSET_METADATA_LOCATION
-from mad_prefect.duckdb import register_mad_protocol
-from mad_prefect.filesystems import get_fs
+from mad_prefect.data_assets.run_history import get_run_history
+from mad_prefect.duckdb import get_connection_pool
+from mad_prefect.filesystems import FsspecFileSystem, get_fs
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +28,42 @@ __all__ = [
     "AssetManifestRun",
     "AssetManifest",
     "load_asset_manifest",
+    "load_asset_manifests",
+    "rebuild_manifest_index",
+    "clear_manifest_cache",
     "persist_asset_manifest",
     "upsert_asset_manifest_from_run",
 ]
 
 
 MANIFEST_FILENAME = "manifest.json"
+MANIFEST_INDEX_FILENAME = "manifest_index.parquet"
+
+# One row per asset variant, the manifest itself is kept as JSON so the index
+# doesn't need migrating when the manifest model gains fields
+_MANIFEST_INDEX_SCHEMA = pa.schema(
+    [
+        ("asset_name", pa.string()),
+        ("asset_id", pa.string()),
+        ("last_status", pa.string()),
+        ("last_materialized", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+        ("manifest", pa.string()),
+    ]
+)
+
+# Details which change whenever a file is rewritten, in order of preference
+_MANIFEST_VERSION_KEYS = ("ETag", "etag", "mtime", "LastModified", "last_modified")
+
+# Manifests loaded or persisted by this process, by resolved path, with the version
+# of the file they were read from or written to
+_manifest_cache: dict[str, tuple[str, "AssetManifest"]] = {}
+_manifest_index_cache: dict[
+    str, tuple[str, dict[tuple[str, str], "AssetManifest"]]
+] = {}
+_manifest_index_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 def _ensure_tzaware(value: datetime | None) -> datetime | None:
@@ -115,20 +151,86 @@ class AssetManifest(BaseModel):
             }
         )
 
+    def with_replaced_artifacts(
+        self, replacements: Mapping[str, Sequence[str]]
+    ) -> "AssetManifest":
+        """Return a copy of the manifest with artifact paths replaced."""
+
+        def replace(paths: Iterable[str]) -> tuple[str, ...]:
+            replaced: list[str] = []
+            for path in paths:
+                for new_path in replacements.get(path, (path,)):
+                    # Several fragments are replaced by the same compacted files
+                    if new_path not in replaced:
+                        replaced.append(new_path)
+            return tuple(replaced)
+
+        last_run = self.last_run
+        if last_run:
+            last_run = last_run.with_artifacts(replace(last_run.artifact_paths))
+
+        return self.model_copy(
+            update={
+                "last_run": last_run,
+                "last_artifacts": replace(self.last_artifacts),
+                "updated_at": datetime.now(timezone.utc),
+            }
+        )
+
 
 def _manifest_path(asset_name: str, asset_id: str) -> str:
     return f"{ASSET_METADATA_LOCATION}/asset_name={asset_name}/asset_id={asset_id}/{MANIFEST_FILENAME}"
 
 
+def _manifest_version(info: dict | None) -> str | None:
+    """Identify the version of a manifest file from its ETag or modification time."""
+
+    if not info:
+        return None
+
+    for key in _MANIFEST_VERSION_KEYS:
+        if info.get(key) is not None:
+            return f"{key}={info[key]}:size={info.get('size')}"
+
+    return None
+
+
+def clear_manifest_cache() -> None:
+    """Forget the manifests cached by this process."""
+
+    _manifest_cache.clear()
+    _manifest_index_cache.clear()
+
+
 async def load_asset_manifest(asset_name: str, asset_id: str) -> AssetManifest | None:
-    """Load the manifest for the given asset if it exists."""
+    """
+    Load the manifest for the given asset if it exists.
+
+    Manifests are cached per process. While the file's ETag (or modification time)
+    matches the cached version, a single `info` call replaces the read.
+    """
 
     fs = await get_fs()
     path = _manifest_path(asset_name, asset_id)
+    cache_key = fs._resolve_path(path)
+    info = await fs.info(path)
 
-    if not fs.exists(path):
+    if info is None:
+        _manifest_cache.pop(cache_key, None)
         return None
 
+    version = _manifest_version(info)
+
+    if version and (cached := _manifest_cache.get(cache_key)):
+        cached_version, manifest = cached
+
+        if cached_version == version:
+            logger.debug(
+                "Using cached asset manifest",
+                extra={"asset_name": asset_name, "asset_id": asset_id, "path": path},
+            )
+            return manifest.model_copy()
+
     try:
         raw_manifest = await fs.read_data(path)
     except Exception:  # pragma: no cover - surfaced via log
@@ -139,7 +241,7 @@ async def load_asset_manifest(asset_name: str, asset_id: str) -> AssetManifest |
         return None
 
     try:
-        return AssetManifest.model_validate(raw_manifest)
+        manifest = AssetManifest.model_validate(raw_manifest)
     except Exception:  # pragma: no cover - surfaced via log
         logger.exception(
             "Failed to parse asset manifest",
@@ -147,6 +249,13 @@ async def load_asset_manifest(asset_name: str, asset_id: str) -> AssetManifest |
         )
         return None
 
+    if version:
+        # The file may have changed since its info was read, then the next load
+        # sees a newer version and reads it again
+        _manifest_cache[cache_key] = (version, manifest.model_copy())
+
+    return manifest
+
 
 async def persist_asset_manifest(manifest: AssetManifest) -> AssetManifest:
     """Persist the provided manifest to the filesystem."""
@@ -154,6 +263,15 @@ async def persist_asset_manifest(manifest: AssetManifest) -> AssetManifest:
     fs = await get_fs()
     path = _manifest_path(manifest.asset_name, manifest.asset_id)
     await fs.write_data(path, manifest.model_dump(mode="json"))
+
+    # Cache what was written, so the next load only checks the file's version
+    cache_key = fs._resolve_path(path)
+    version = _manifest_version(await fs.info(path))
+
+    if version:
+        _manifest_cache[cache_key] = (version, manifest.model_copy())
+    else:
+        _manifest_cache.pop(cache_key, None)
     logger.debug(
         "Persisted asset manifest",
         extra={
@@ -162,9 +280,152 @@ async def persist_asset_manifest(manifest: AssetManifest) -> AssetManifest:
             "path": path,
         },
     )
+
+    try:
+        await _update_manifest_index(fs, manifest)
+    except Exception:  # pragma: no cover - surfaced via log
+        # The manifest itself is the source of truth, the index can be rebuilt
+        logger.exception(
+            "Failed to update the asset manifest index",
+            extra={"asset_name": manifest.asset_name, "asset_id": manifest.asset_id},
+        )
+
     return manifest
 
 
+def _manifest_index_path() -> str:
+    return f"{ASSET_METADATA_LOCATION}/{MANIFEST_INDEX_FILENAME}"
+
+
+async def _read_manifest_index(
+    fs: FsspecFileSystem,
+) -> dict[tuple[str, str], AssetManifest]:
+    path = _manifest_index_path()
+    cache_key = fs._resolve_path(path)
+    info = await fs.info(path)
+
+    if info is None:
+        _manifest_index_cache.pop(cache_key, None)
+        return {}
+
+    version = _manifest_version(info)
+    cached = _manifest_index_cache.get(cache_key)
+
+    if version and cached and cached[0] == version:
+        return dict(cached[1])
+
+    table = pq.read_table(io.BytesIO(await fs.read_path(path)), columns=["manifest"])
+    manifests: dict[tuple[str, str], AssetManifest] = {}
+
+    for raw_manifest in table.column("manifest").to_pylist():
+        manifest = AssetManifest.model_validate_json(raw_manifest)
+        manifests[(manifest.asset_name, manifest.asset_id)] = manifest
+
+    if version:
+        _manifest_index_cache[cache_key] = (version, manifests)
+
+    return dict(manifests)
+
+
+async def _write_manifest_index(
+    fs: FsspecFileSystem, manifests: dict[tuple[str, str], AssetManifest]
+) -> None:
+    rows = [
+        {
+            "asset_name": manifest.asset_name,
+            "asset_id": manifest.asset_id,
+            "last_status": manifest.last_status.value,
+            "last_materialized": manifest.last_materialized,
+            "updated_at": manifest.updated_at,
+            "manifest": manifest.model_dump_json(),
+        }
+        for _, manifest in sorted(manifests.items())
+    ]
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pylist(rows, schema=_MANIFEST_INDEX_SCHEMA), buffer)
+
+    path = _manifest_index_path()
+    await fs.write_path(path, buffer.getvalue())
+
+    cache_key = fs._resolve_path(path)
+    version = _manifest_version(await fs.info(path))
+
+    if version:
+        _manifest_index_cache[cache_key] = (version, dict(manifests))
+    else:
+        _manifest_index_cache.pop(cache_key, None)
+
+
+async def _update_manifest_index(fs: FsspecFileSystem, manifest: AssetManifest):
+    # Updates are read-modify-write, concurrent assets in this process take turns
+    loop = asyncio.get_running_loop()
+    lock = _manifest_index_locks.setdefault(loop, asyncio.Lock())
+
+    async with lock:
+        manifests = await _read_manifest_index(fs)
+        key = (manifest.asset_name, manifest.asset_id)
+        indexed = manifests.get(key)
+
+        # Another process may have indexed a newer manifest in the meantime
+        if indexed and indexed.updated_at > manifest.updated_at:
+            return
+
+        manifests[key] = manifest
+        await _write_manifest_index(fs, manifests)
+
+
+async def load_asset_manifests(
+    asset_names: Iterable[str] | None = None,
+) -> list[AssetManifest]:
+    """
+    Load the manifests of many assets from the manifest index in one read.
+
+    Returns the manifest of every variant (asset id) of `asset_names`, or of every
+    asset when no names are given. The index is updated whenever a manifest is
+    persisted. Processes which persist manifests at the same moment can overwrite
+    each other's index updates, in which case `load_asset_manifest` still returns
+    the latest manifest and `rebuild_manifest_index` restores the index.
+    """
+
+    fs = await get_fs()
+    manifests = await _read_manifest_index(fs)
+    names = set(asset_names) if asset_names is not None else None
+
+    return [
+        manifest
+        for (asset_name, _), manifest in sorted(manifests.items())
+        if names is None or asset_name in names
+    ]
+
+
+async def rebuild_manifest_index() -> int:
+    """Rebuild the manifest index from every asset's manifest, returns its size."""
+
+    fs = await get_fs()
+    manifest_glob = (
+        f"{ASSET_METADATA_LOCATION}/asset_name=*/asset_id=*/{MANIFEST_FILENAME}"
+    )
+    manifests: dict[tuple[str, str], AssetManifest] = {}
+
+    for path in fs.glob(manifest_glob):
+        try:
+            manifest = AssetManifest.model_validate(await fs.read_data(path))
+        except Exception:  # pragma: no cover - surfaced via log
+            logger.exception("Failed to index asset manifest", extra={"path": path})
+            continue
+
+        manifests[(manifest.asset_name, manifest.asset_id)] = manifest
+
+    loop = asyncio.get_running_loop()
+    lock = _manifest_index_locks.setdefault(loop, asyncio.Lock())
+
+    async with lock:
+        await _write_manifest_index(fs, manifests)
+
+    logger.info("Rebuilt the asset manifest index with %s manifests.", len(manifests))
+    return len(manifests)
+
+
 async def upsert_asset_manifest_from_run(
     *,
     asset_name: str,
@@ -215,19 +476,29 @@ async def get_asset_metadata(
     asset_name: str,
     asset_id: str,
 ) -> duckdb.DuckDBPyRelation | None:
-    """Return asset metadata for the provided asset if available."""
+    """
+    Return asset metadata for the provided asset if available.
+
+    Runs are read from the run history. Assets without any runs in the history
+    fall back to reading every `metadata.json` they wrote, until they're backfilled.
+    """
+
+    history = await get_run_history(asset_name, asset_id)
+
+    if history is not None and history.limit(1).fetchone():
+        return history
 
-    await register_mad_protocol()
     fs = await get_fs()
 
-    metadata_glob = (
-        f"{ASSET_METADATA_LOCATION}/asset_name={asset_name}/asset_id={asset_id}/**/*.json"
-    )
+    # Only run metadata, not the manifest or lease stored next to it
+    metadata_glob = f"{ASSET_METADATA_LOCATION}/asset_name={asset_name}/asset_id={asset_id}/asset_run_id=*/metadata.json"
     logger.debug("Searching for asset metadata with glob: %s", metadata_glob)
 
     if fs.glob(metadata_glob):
-        return duckdb.query(
+        pool = await get_connection_pool()
+        relation = pool.connection.query(
             f"SELECT UNNEST(data, max_depth:=2) FROM read_json('mad://{metadata_glob}')"
         )
+        return pool.track(relation)
 
     return None
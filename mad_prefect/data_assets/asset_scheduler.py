@@ -0,0 +1,235 @@
+"""Concurrent materialization of the assets a flow depends on.
+
+An asset's upstream assets are the `DataAsset` objects among its arguments (or
+their arguments, and so on). `AssetScheduler` materializes an asset's upstream
+assets before the asset itself, and assets which don't depend on each other
+concurrently, up to `max_concurrency` at a time.
+
+While a scheduler runs, every asset is materialized at most once. When asset
+code awaits an asset the scheduler already materialized (e.g. an upstream asset
+passed as an argument), the artifact is reused instead of materializing the
+asset again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import nullcontext
+import contextvars
+import logging
+import os
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable
+
+from mad_prefect.data_assets.data_asset import DataAsset
+
+if TYPE_CHECKING:
+    from mad_prefect.data_assets.data_artifact import DataArtifact
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "AssetScheduler",
+    "materialize_assets",
+    "schedule_yielded_assets",
+    "upstream_assets",
+]
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("ASSET_SCHEDULER_MAX_CONCURRENCY", "4"))
+
+# The scheduler materializing assets in this context, and the asset it's running
+_current_scheduler: contextvars.ContextVar[AssetScheduler | None] = (
+    contextvars.ContextVar("current_asset_scheduler", default=None)
+)
+_running_asset: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "running_asset", default=None
+)
+
+
+def upstream_assets(asset: DataAsset) -> list[DataAsset]:
+    """
+    The assets among the arguments `asset` is bound to, directly or in a list,
+    tuple, set or dict of arguments. Each asset is listed once.
+    """
+    upstream: dict[int, DataAsset] = {}
+
+    def collect(value: Any):
+        if isinstance(value, DataAsset):
+            upstream.setdefault(id(value), value)
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            for item in value:
+                collect(item)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+
+    for value in asset._callable.get_bound_arguments().arguments.values():
+        collect(value)
+
+    upstream.pop(id(asset), None)
+    return list(upstream.values())
+
+
+def scheduled_asset_key(asset: DataAsset) -> str:
+    """The key an asset is materialized once under, its id once it's formatted."""
+    asset._callable._format_asset(asset)
+    return asset.id
+
+
+class AssetScheduler:
+    """
+    Materialize assets after their upstream assets, independent assets concurrently.
+
+    Schedulers created with the `tasks` of another scheduler share its
+    materializations, but not its concurrency limit.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        *,
+        tasks: dict[str, asyncio.Task[DataArtifact]] | None = None,
+    ):
+        max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: dict[str, asyncio.Task[DataArtifact]] = (
+            tasks if tasks is not None else {}
+        )
+
+    @staticmethod
+    def current() -> AssetScheduler | None:
+        """The scheduler materializing the asset which is running, if any."""
+        return _current_scheduler.get()
+
+    def is_running(self, asset: DataAsset) -> bool:
+        """Whether `asset` is the asset this scheduler is running in this context."""
+        return _running_asset.get() == scheduled_asset_key(asset)
+
+    async def materialize(
+        self, asset: DataAsset, *, limited: bool = False
+    ) -> DataArtifact:
+        """
+        Materialize `asset` after its upstream assets, or reuse its artifact. When
+        `limited`, the asset and its upstream assets wait for one of the
+        scheduler's `max_concurrency` slots before they run.
+        """
+        key = scheduled_asset_key(asset)
+        task = self._tasks.get(key)
+
+        if task is None:
+            context = contextvars.copy_context()
+            context.run(_current_scheduler.set, self)
+            task = asyncio.get_running_loop().create_task(
+                self._run(asset, key, limited), context=context
+            )
+            self._tasks[key] = task
+        else:
+            logger.debug(f"Reusing the scheduled materialization of '{asset.name}'")
+
+        return await task
+
+    async def materialize_all(
+        self, assets: Iterable[DataAsset]
+    ) -> list[DataArtifact]:
+        """
+        Materialize `assets` and their upstream assets, at most `max_concurrency` at
+        a time. Returns the artifact of each of `assets` in order. If an asset
+        fails, the assets still running are cancelled.
+        """
+        tasks = [
+            asyncio.ensure_future(self.materialize(asset, limited=True))
+            for asset in assets
+        ]
+
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # Cancelling a waiting task cancels the materialization it waits on
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _run(self, asset: DataAsset, key: str, limited: bool) -> DataArtifact:
+        upstream = upstream_assets(asset)
+
+        if upstream:
+            logger.debug(
+                f"Materializing {len(upstream)} upstream assets of '{asset.name}'"
+            )
+            await asyncio.gather(
+                *(self.materialize(u, limited=limited) for u in upstream)
+            )
+
+        async with self._semaphore if limited else nullcontext():
+            _running_asset.set(key)
+            logger.debug(f"Scheduler materializing asset '{asset.name}'")
+            return await asset()
+
+
+async def materialize_assets(
+    *assets: DataAsset, max_concurrency: int | None = None
+) -> list[DataArtifact]:
+    """
+    Materialize `assets` and their upstream assets, independent assets concurrently
+    and at most `max_concurrency` (`ASSET_SCHEDULER_MAX_CONCURRENCY`, 4 by default)
+    at a time. Returns the artifact of each of `assets` in order.
+    """
+    return await AssetScheduler(max_concurrency).materialize_all(assets)
+
+
+async def schedule_yielded_assets(
+    batches: AsyncIterator[Any],
+) -> AsyncIterator[Any]:
+    """
+    Replace the `DataAsset` objects in `batches` with tasks materializing them.
+
+    Consecutive assets are read ahead and scheduled together, so they're
+    materialized concurrently while the tasks are awaited in the order the assets
+    were yielded. Inside a scheduler, the assets share its materializations. They
+    have slots of their own, as the asset yielding them holds one of its slots.
+    """
+    current = AssetScheduler.current()
+    scheduler = (
+        AssetScheduler(current.max_concurrency, tasks=current._tasks)
+        if current
+        else AssetScheduler()
+    )
+    assets: list[DataAsset] = []
+    scheduled: list[asyncio.Future[DataArtifact]] = []
+
+    def schedule() -> list[asyncio.Future[DataArtifact]]:
+        tasks = [
+            asyncio.ensure_future(scheduler.materialize(asset, limited=True))
+            for asset in assets
+        ]
+        assets.clear()
+        scheduled.extend(tasks)
+        return tasks
+
+    try:
+        async for batch in batches:
+            if isinstance(batch, DataAsset):
+                assets.append(batch)
+                continue
+
+            for task in schedule():
+                yield task
+
+            yield batch
+
+        for task in schedule():
+            yield task
+    except BaseException:
+        # The consumer stopped or failed, the tasks it won't await are cancelled
+        for task in scheduled:
+            if not task.done():
+                task.cancel()
+
+        await asyncio.gather(*scheduled, return_exceptions=True)
+        raise
@@ -0,0 +1,156 @@
+"""Byte-based sizing for the Arrow batches ``DataArtifact`` writers stream.
+
+Relations are read in batches sized from their column types, then coalesced or
+split on the measured size of the batches, so narrow tables don't pay a
+per-batch overhead for every thousand rows and very wide rows don't produce
+batches which exhaust the worker's memory. Parquet row groups follow the same
+target.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Iterable, Iterator
+
+import duckdb
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGET_BATCH_BYTES = 8 * 1024 * 1024
+
+# DuckDB produces vectors of 2048 rows, reading fewer rows per batch only adds overhead
+MIN_BATCH_ROWS = 2048
+MAX_BATCH_ROWS = 1024 * 1024
+
+# Width guess for values whose size can only be measured (strings, blobs, JSON)
+_VARIABLE_WIDTH_BYTES = 32
+
+_FIXED_WIDTH_BYTES: dict[str, int] = {
+    "boolean": 1,
+    "tinyint": 1,
+    "utinyint": 1,
+    "smallint": 2,
+    "usmallint": 2,
+    "integer": 4,
+    "uinteger": 4,
+    "float": 4,
+    "date": 4,
+    "bigint": 8,
+    "ubigint": 8,
+    "double": 8,
+    "time": 8,
+    "time with time zone": 8,
+    "timestamp": 8,
+    "timestamp with time zone": 8,
+    "timestamp_s": 8,
+    "timestamp_ms": 8,
+    "timestamp_ns": 8,
+    "decimal": 16,
+    "hugeint": 16,
+    "uhugeint": 16,
+    "uuid": 16,
+    "interval": 16,
+}
+
+# Lists and maps are assumed to hold a handful of values per row
+_NESTED_VALUES_ESTIMATE = 4
+
+
+def estimate_value_bytes(duckdb_type: Any) -> int:
+    """Estimate the Arrow size of one value of a DuckDB type, including its validity bit."""
+    # DuckDBPyType moved from duckdb.typing to duckdb.sqltypes, so it's used structurally
+    type_id = duckdb_type.id
+
+    if type_id == "struct":
+        width = sum(estimate_value_bytes(child) for _, child in duckdb_type.children)
+    elif type_id in ("list", "map", "array"):
+        children = sum(
+            estimate_value_bytes(child)
+            for _, child in duckdb_type.children
+            # Fixed size arrays list their size next to the child type
+            if hasattr(child, "id")
+        )
+        # Offsets plus the children the list is expected to hold
+        width = 4 + _NESTED_VALUES_ESTIMATE * children
+    else:
+        width = _FIXED_WIDTH_BYTES.get(type_id, 4 + _VARIABLE_WIDTH_BYTES)
+
+    return width + 1
+
+
+def estimate_row_bytes(relation: duckdb.DuckDBPyRelation) -> int:
+    """Estimate the Arrow size of one row of `relation` from its column types."""
+    return max(1, sum(estimate_value_bytes(t) for t in relation.types))
+
+
+def rows_for_bytes(row_bytes: float, target_bytes: int) -> int:
+    """The number of rows of `row_bytes` each which fit in `target_bytes`, within the batch limits."""
+    rows = int(target_bytes // max(row_bytes, 1))
+    return min(max(rows, MIN_BATCH_ROWS), MAX_BATCH_ROWS)
+
+
+def sized_batches(
+    batches: Iterable[pa.RecordBatch], target_bytes: int
+) -> Iterator[pa.RecordBatch]:
+    """
+    Re-chunk `batches` into batches of roughly `target_bytes`.
+
+    Batches are buffered until they reach the target, then sliced into batches
+    of as many rows as fit in the target at the measured row size. Rows which
+    don't fill a batch are carried over to the next one.
+    """
+    pending: list[pa.RecordBatch] = []
+    pending_bytes = 0
+
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+
+        pending.append(batch)
+        pending_bytes += batch.nbytes
+
+        if pending_bytes < target_bytes:
+            continue
+
+        combined = _combine(pending)
+        rows = max(1, math.floor(target_bytes / (combined.nbytes / combined.num_rows)))
+        offset = 0
+
+        while combined.num_rows - offset >= rows:
+            yield combined.slice(offset, rows)
+            offset += rows
+
+        pending = [combined.slice(offset)] if offset < combined.num_rows else []
+        pending_bytes = sum(b.nbytes for b in pending)
+
+    if pending:
+        yield _combine(pending)
+
+
+def _combine(batches: list[pa.RecordBatch]) -> pa.RecordBatch:
+    if len(batches) == 1:
+        return batches[0]
+
+    table = pa.Table.from_batches(batches).combine_chunks()
+    return table.to_batches()[0]
+
+
+def read_sized_batches(
+    relation: duckdb.DuckDBPyRelation, target_bytes: int
+) -> tuple[pa.RecordBatchReader, Iterator[pa.RecordBatch]]:
+    """
+    Stream `relation` as Arrow batches of roughly `target_bytes`.
+
+    DuckDB is asked for batches sized from the relation's column types, and the
+    batches are re-chunked on their measured size. Returns the underlying reader,
+    which the caller closes, along with the sized batches.
+    """
+    batch_rows = rows_for_bytes(estimate_row_bytes(relation), target_bytes)
+    logger.debug(
+        f"Streaming relation in batches of {batch_rows} rows (target {target_bytes} bytes)"
+    )
+    reader = relation.fetch_arrow_reader(batch_rows)
+
+    return reader, sized_batches(reader, target_bytes)
@@ -0,0 +1,287 @@
+"""Compaction of the small fragment files collected into artifact directories.
+
+Every run of a snapshotted asset adds a `year=/month=/day=/runtime=` directory of
+`fragment=N` files, so hive globs over an asset's history end up opening
+thousands of small files. Compaction rewrites the small files of each partition
+directory into a few files of roughly `target_file_bytes`.
+
+Compacted files are written to a staging directory and only moved into the
+partition once they're complete, so readers never see a partially written file.
+The manifest is updated before the replaced fragments are deleted, so a manifest
+never references files which no longer exist.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+import logging
+import os
+import posixpath
+from typing import Iterable, Iterator
+from uuid import uuid4
+
+import pyarrow as pa
+from pydantic import BaseModel
+
+from mad_prefect.data_assets.artifact_paths import (
+    artifact_suffix,
+    parse_artifact_suffix,
+)
+from mad_prefect.data_assets.asset_metadata import (
+    AssetManifest,
+    load_asset_manifest,
+    persist_asset_manifest,
+)
+from mad_prefect.data_assets.batching import read_sized_batches
+from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.data_assets.data_artifact_query import DataArtifactQuery
+from mad_prefect.data_assets.data_asset_options import DataAssetOptions
+from mad_prefect.filesystems import get_fs
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "PartitionCompaction",
+    "compact_artifacts",
+]
+
+DEFAULT_TARGET_FILE_BYTES = 128 * 1024 * 1024
+
+# Partitions with fewer small files than this are left alone
+DEFAULT_MIN_FRAGMENTS = 2
+
+# Compacted files are staged here, outside any artifact directory readers glob
+COMPACTION_STAGING_DIR = os.getenv("COMPACTION_STAGING_DIR", "_compaction")
+
+
+class PartitionCompaction(BaseModel):
+    """The small files of one partition directory and the files which replaced them."""
+
+    partition: str
+    suffix: str
+    source_paths: tuple[str, ...]
+    compacted_paths: tuple[str, ...]
+
+
+async def compact_artifacts(
+    artifacts_dir: str,
+    options: DataAssetOptions | None = None,
+    *,
+    target_file_bytes: int | None = None,
+    min_fragments: int = DEFAULT_MIN_FRAGMENTS,
+    asset_name: str | None = None,
+    asset_id: str | None = None,
+) -> list[PartitionCompaction]:
+    """
+    Merge the small artifact files below `artifacts_dir` into files of roughly
+    `target_file_bytes` each, one partition directory at a time.
+
+    Files smaller than `target_file_bytes` are compacted when a directory holds at
+    least `min_fragments` of them with the same filetype and compression. The
+    target is measured on the Arrow batches written to each file, so encoded files
+    are smaller (Parquet) or larger (JSON) than the target. Artifacts are read and
+    written with the asset's `options`. When `asset_name` and `asset_id` are set,
+    paths in the asset's manifest which were compacted are replaced by the
+    compacted files.
+    """
+    if min_fragments < 2:
+        raise ValueError("min_fragments must be at least 2")
+
+    options = options or DataAssetOptions()
+    target_bytes = target_file_bytes or DEFAULT_TARGET_FILE_BYTES
+    fs = await get_fs()
+    artifacts_dir = artifacts_dir.strip("/")
+
+    files = await fs.list_files(artifacts_dir)
+    partitions = _group_small_files(files, target_bytes)
+    manifest = (
+        await load_asset_manifest(asset_name, asset_id)
+        if asset_name and asset_id
+        else None
+    )
+
+    logger.info(
+        f"Compacting artifacts in {artifacts_dir}: {len(files)} files in {len(partitions)} partitions."
+    )
+
+    token = uuid4().hex[:12]
+    staging_dir = f"{COMPACTION_STAGING_DIR}/{token}"
+    compactions: list[PartitionCompaction] = []
+
+    try:
+        for (partition, suffix), source_paths in sorted(partitions.items()):
+            if len(source_paths) < min_fragments:
+                continue
+
+            staged_paths = await _write_compacted(
+                source_paths,
+                f"{staging_dir}/{len(compactions)}",
+                suffix,
+                target_bytes,
+                options,
+            )
+
+            if not staged_paths:
+                logger.warning(
+                    f"Nothing was compacted in {partition}, keeping its files."
+                )
+                continue
+
+            # Publish the complete files next to the fragments they replace
+            compacted_paths: list[str] = []
+
+            for n, staged_path in enumerate(staged_paths):
+                compacted_path = f"{partition}/compacted={token}-{n}{suffix}"
+                await fs.move_path(staged_path, compacted_path)
+                compacted_paths.append(compacted_path)
+
+            compaction = PartitionCompaction(
+                partition=partition,
+                suffix=suffix,
+                source_paths=tuple(source_paths),
+                compacted_paths=tuple(compacted_paths),
+            )
+
+            if manifest:
+                manifest = await _update_manifest(manifest, compaction)
+
+            for source_path in source_paths:
+                await fs.delete_path(source_path)
+
+            logger.info(
+                f"Compacted {len(source_paths)} files in {partition} into {len(compacted_paths)}."
+            )
+            compactions.append(compaction)
+    finally:
+        await fs.delete_path(staging_dir, recursive=True)
+
+    return compactions
+
+
+def _group_small_files(
+    files: dict[str, int], target_bytes: int
+) -> dict[tuple[str, str], list[str]]:
+    """Group the artifact files smaller than `target_bytes` by directory and suffix."""
+    partitions: dict[tuple[str, str], list[str]] = defaultdict(list)
+
+    for path, size in files.items():
+        if size >= target_bytes:
+            continue
+
+        try:
+            suffix = artifact_suffix(*parse_artifact_suffix(path))
+        except ValueError:
+            # Not an artifact, e.g. a manifest or an unrelated file
+            continue
+
+        partitions[(posixpath.dirname(path), suffix)].append(path)
+
+    return {
+        key: sorted(paths, key=_fragment_order) for key, paths in partitions.items()
+    }
+
+
+def _fragment_order(path: str) -> tuple[str, int, str]:
+    # Keep fragment=N files in the order they were yielded rather than lexical order
+    stem = posixpath.basename(path).split(".")[0]
+    key, _, number = stem.partition("=")
+    return (key, int(number), path) if number.isdigit() else (key, -1, path)
+
+
+async def _write_compacted(
+    source_paths: list[str],
+    staging_dir: str,
+    suffix: str,
+    target_bytes: int,
+    options: DataAssetOptions,
+) -> list[str]:
+    sources = [_artifact(path, options) for path in source_paths]
+
+    for source in sources:
+        source.persisted = True
+
+    relation = await DataArtifactQuery(
+        sources,
+        options.read_json_options,
+        options.read_csv_options,
+        duckdb_settings=options.duckdb_settings,
+    ).query()
+
+    if relation is None:
+        return []
+
+    staged_paths: list[str] = []
+    # A file holds at least one batch, so batches are never larger than the files
+    reader, batches = read_sized_batches(
+        relation, min(sources[0].batch_bytes, target_bytes)
+    )
+
+    try:
+        for file_batches in _split_by_bytes(batches, target_bytes):
+            artifact = _artifact(
+                f"{staging_dir}/{len(staged_paths)}{suffix}", options
+            )
+            artifact.data = file_batches
+
+            if await artifact.persist():
+                staged_paths.append(artifact.path)
+    finally:
+        reader.close()
+
+    return staged_paths
+
+
+def _split_by_bytes(
+    batches: Iterable[pa.RecordBatch], target_bytes: int
+) -> Iterator[Iterator[pa.RecordBatch]]:
+    """
+    Split `batches` into consecutive runs of at most `target_bytes`, each run is
+    consumed before the next one starts and holds at least one batch.
+    """
+    batches = iter(batches)
+    pending: list[pa.RecordBatch | None] = [next(batches, None)]
+
+    def run() -> Iterator[pa.RecordBatch]:
+        taken = 0
+
+        while (batch := pending[0]) is not None and (
+            not taken or taken + batch.nbytes <= target_bytes
+        ):
+            pending[0] = next(batches, None)
+            taken += batch.nbytes
+            yield batch
+
+    while pending[0] is not None:
+        yield run()
+
+
+def _artifact(path: str, options: DataAssetOptions) -> DataArtifact:
+    return DataArtifact(
+        path,
+        read_json_options=options.read_json_options,
+        read_csv_options=options.read_csv_options,
+        serialization_executor=options.serialization_executor,
+        duckdb_settings=options.duckdb_settings,
+        target_batch_bytes=options.target_batch_bytes,
+        json_encoder=options.json_encoder,
+        schema_inference_batches=options.schema_inference_batches,
+        write_parquet_options=options.write_parquet_options,
+    )
+
+
+async def _update_manifest(
+    manifest: AssetManifest, compaction: PartitionCompaction
+) -> AssetManifest:
+    referenced = set(manifest.last_artifacts)
+
+    if manifest.last_run:
+        referenced.update(manifest.last_run.artifact_paths)
+
+    if referenced.isdisjoint(compaction.source_paths):
+        return manifest
+
+    # One write swaps every compacted path, readers see the old or the new files
+    manifest = manifest.with_replaced_artifacts(
+        {path: compaction.compacted_paths for path in compaction.source_paths}
+    )
+    return await persist_asset_manifest(manifest)
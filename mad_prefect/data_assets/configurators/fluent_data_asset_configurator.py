@@ -2,13 +2,25 @@ import logging
 from datetime import timedelta
 from functools import partial
 from typing import Generic, ParamSpec, TypeVar, overload
-from mad_prefect.data_assets.asset_decorator import ARTIFACT_FILE_TYPES
+from mad_prefect.data_assets.asset_decorator import (
+    ARTIFACT_COMPRESSIONS,
+    ARTIFACT_FILE_TYPES,
+)
 from mad_prefect.data_assets.data_asset import (
     DataAsset,
     CACHE_FIRST_CACHE_EXPIRATION,
 )
 from mad_prefect.data_assets.data_asset_options import DataAssetOptions
-from mad_prefect.data_assets.options import ReadCSVOptions, ReadJsonOptions
+from mad_prefect.data_assets.options import (
+    ReadCSVOptions,
+    ReadJsonOptions,
+    WriteParquetOptions,
+)
+from mad_prefect.data_assets.serialization import (
+    JSON_ENCODERS,
+    SERIALIZATION_EXECUTORS,
+)
+from mad_prefect.duckdb import DuckDBSettings
 
 P = ParamSpec("P")
 R = TypeVar("R")
@@ -52,6 +64,17 @@ class FluentDataAssetConfigurator(Generic[P, R]):
         read_json_options: ReadJsonOptions | None = None,
         read_csv_options: ReadCSVOptions | None = None,
         cache_expiration: timedelta | None = None,
+        max_in_flight_persists: int | None = None,
+        serialization_executor: SERIALIZATION_EXECUTORS | None = None,
+        duckdb_settings: DuckDBSettings | None = None,
+        target_batch_bytes: int | None = None,
+        json_encoder: JSON_ENCODERS | None = None,
+        schema_inference_batches: int | None = None,
+        write_parquet_options: WriteParquetOptions | None = None,
+        artifact_compression: ARTIFACT_COMPRESSIONS | None = None,
+        fragment_target_rows: int | None = None,
+        fragment_target_bytes: int | None = None,
+        materialization_lock: bool | None = None,
     ):
         logger.debug(f"Configuring asset '{self.asset.name}' with new options.")
         # Default to the current asset's options for any None values
@@ -63,6 +86,29 @@ class FluentDataAssetConfigurator(Generic[P, R]):
             read_json_options=read_json_options or self.asset.options.read_json_options,
             read_csv_options=read_csv_options or self.asset.options.read_csv_options,
             cache_expiration=cache_expiration or self.asset.options.cache_expiration,
+            max_in_flight_persists=max_in_flight_persists
+            or self.asset.options.max_in_flight_persists,
+            serialization_executor=serialization_executor
+            or self.asset.options.serialization_executor,
+            duckdb_settings=duckdb_settings or self.asset.options.duckdb_settings,
+            target_batch_bytes=target_batch_bytes
+            or self.asset.options.target_batch_bytes,
+            json_encoder=json_encoder or self.asset.options.json_encoder,
+            schema_inference_batches=schema_inference_batches
+            or self.asset.options.schema_inference_batches,
+            write_parquet_options=write_parquet_options
+            or self.asset.options.write_parquet_options,
+            artifact_compression=artifact_compression
+            or self.asset.options.artifact_compression,
+            fragment_target_rows=fragment_target_rows
+            or self.asset.options.fragment_target_rows,
+            fragment_target_bytes=fragment_target_bytes
+            or self.asset.options.fragment_target_bytes,
+            materialization_lock=(
+                materialization_lock
+                if materialization_lock is not None
+                else self.asset.options.materialization_lock
+            ),
         )
         asset = DataAsset(
             self.asset._fn,
@@ -1,24 +1,58 @@
-import json
+import asyncio
 import logging
 import os
-from typing import BinaryIO, Sequence, cast, Any
+from functools import partial
+from typing import Any, BinaryIO, Callable, cast
 import duckdb
 import httpx
-import jsonlines
 import pandas as pd
-from pydantic import TypeAdapter
-from mad_prefect.data_assets import ARTIFACT_FILE_TYPES
-from mad_prefect.data_assets.options import ReadCSVOptions, ReadJsonOptions
+from mad_prefect.data_assets import ARTIFACT_COMPRESSIONS, ARTIFACT_FILE_TYPES
+from mad_prefect.data_assets.artifact_paths import parse_artifact_suffix
+from mad_prefect.data_assets.batching import (
+    DEFAULT_TARGET_BATCH_BYTES,
+    estimate_row_bytes,
+    read_sized_batches,
+    rows_for_bytes,
+)
+from mad_prefect.data_assets.options import (
+    ReadCSVOptions,
+    ReadJsonOptions,
+    WriteParquetOptions,
+)
+from mad_prefect.data_assets.serialization import (
+    JSON_ENCODERS,
+    SERIALIZATION_EXECUTORS,
+    align_to_schema,
+    encode_arrow_jsonl,
+    encode_jsonl,
+    run_serializer,
+    to_record_batch,
+    to_table,
+    unify_schema,
+)
 from mad_prefect.data_assets.utils import safe_truthy, yield_data_batches
-from mad_prefect.duckdb import register_mad_protocol, register_fsspec_filesystem
+from mad_prefect.duckdb import (
+    DuckDBSettings,
+    get_connection_pool,
+    get_relation_connection,
+    register_mad_protocol,
+    register_fsspec_filesystem,
+)
 from mad_prefect.filesystems import get_fs
 import pyarrow as pa
+import pyarrow.ipc as ipc
 import pyarrow.parquet as pq
 import pyarrow.csv as pacsv
-from mad_prefect.json.mad_json_encoder import MADJSONEncoder
 
 logger = logging.getLogger(__name__)
 
+# DuckDB COPY formats for each artifact filetype, JSON is written as newline delimited.
+# DuckDB can't write Arrow IPC files, those are written from Arrow batches by pyarrow
+COPY_FORMATS: dict[str, str] = {"json": "JSON", "parquet": "PARQUET", "csv": "CSV"}
+
+# Parquet batches buffered to infer the file's schema before it's written
+DEFAULT_SCHEMA_INFERENCE_BATCHES = 4
+
 
 class DataArtifact:
     def __init__(
@@ -27,19 +61,37 @@ class DataArtifact:
         data: object | None = None,
         read_json_options: ReadJsonOptions | None = None,
         read_csv_options: ReadCSVOptions | None = None,
+        serialization_executor: SERIALIZATION_EXECUTORS | None = None,
+        duckdb_settings: DuckDBSettings | None = None,
+        target_batch_bytes: int | None = None,
+        json_encoder: JSON_ENCODERS | None = None,
+        schema_inference_batches: int | None = None,
+        write_parquet_options: WriteParquetOptions | None = None,
     ):
         self.path = path
         logger.debug(f"Initializing DataArtifact for path: {self.path}")
-        filetype = os.path.splitext(self.path)[1].lstrip(".")
+        filetype, compression = parse_artifact_suffix(self.path)
 
-        if filetype not in ["json", "parquet", "csv"]:
-            raise ValueError(f"Unsupported file type: {filetype}")
+        if schema_inference_batches is not None and schema_inference_batches < 1:
+            raise ValueError("schema_inference_batches must be at least 1")
 
-        self.filetype: ARTIFACT_FILE_TYPES = cast(ARTIFACT_FILE_TYPES, filetype)
+        self.filetype: ARTIFACT_FILE_TYPES = filetype
+        self.compression: ARTIFACT_COMPRESSIONS | None = compression
         self.data = data
         self.read_json_options = read_json_options or ReadJsonOptions()
         self.read_csv_options = read_csv_options or ReadCSVOptions()
+        self.serialization_executor: SERIALIZATION_EXECUTORS | None = (
+            serialization_executor
+        )
+        self.duckdb_settings = duckdb_settings
+        self.target_batch_bytes = target_batch_bytes
+        self.json_encoder: JSON_ENCODERS = json_encoder or "standard"
+        self.schema_inference_batches = (
+            schema_inference_batches or DEFAULT_SCHEMA_INFERENCE_BATCHES
+        )
+        self.write_parquet_options = write_parquet_options or WriteParquetOptions()
         self.persisted = False
+        self._file: BinaryIO | None = None
 
     async def persist(self):
         logger.debug(f"Persist called for artifact: {self.path}")
@@ -57,11 +109,10 @@ class DataArtifact:
         logger.info(f"Persisting artifact to {self.path} as type '{self.filetype}'.")
         await register_mad_protocol()
 
-        # preserve_insertion_order to improve memory usage.
-        # https://duckdb.org/docs/guides/performance/how_to_tune_workloads.html#the-preserve_insertion_order-option
-        # duckdb.query("SET preserve_insertion_order = false;")
-
-        if isinstance(self.data, duckdb.DuckDBPyRelation):
+        if (
+            isinstance(self.data, duckdb.DuckDBPyRelation)
+            and self.filetype in COPY_FORMATS
+        ):
             # There is a bug with fsspec and duckdb see test: test_overwriting_existing_file
             # to work around the bug, instead of setting (use_tmp_file 0) in the query, we will directly reference
             # the wrapped filesystem
@@ -77,10 +128,20 @@ class DataArtifact:
 
             path = fs._resolve_path(self.path)
 
+            # Relations can only be scanned by the connection that created them, so run
+            # the COPY on the relation's own connection. `execute` lets DuckDB's worker
+            # threads call back into fsspec, running the COPY through the relation
+            # (`relation.query`) deadlocks once DuckDB uses three or more threads.
+            # Pooled connections register the filesystem when they're created and run
+            # with the pool's DuckDB settings, the default connection needs it
+            # registered globally.
             register_fsspec_filesystem(fs._fs)
             logger.debug(f"Persisting DuckDB relation to {protocol}://{path}")
             _d = self.data
-            duckdb.execute(f"COPY _d TO '{protocol}://{path}'")
+            connection = get_relation_connection(_d)
+            connection.execute(
+                f"COPY _d TO '{protocol}://{path}' {self.copy_options(lambda: _d)}"
+            )
         else:
             if self.filetype == "json":
                 await self._persist_json()
@@ -88,6 +149,8 @@ class DataArtifact:
                 await self._persist_parquet()
             elif self.filetype == "csv":
                 await self._persist_csv()
+            elif self.filetype == "arrow":
+                await self._persist_arrow()
             else:
                 raise ValueError(f"Unsupported file format {self.filetype}")
 
@@ -108,51 +171,63 @@ class DataArtifact:
     async def _open(self):
         fs = await get_fs()
         logger.debug(f"Opening file for writing: {self.path}")
-        return cast(BinaryIO, await fs.open(self.path, "wb", True))
+        # Compressed artifacts are compressed as they're streamed to the filesystem
+        self._file = cast(
+            BinaryIO, await fs.open(self.path, "wb", True, compression=self.compression)
+        )
+        return self._file
+
+    @property
+    def bytes_written(self) -> int:
+        """Bytes written to the open file so far, before compression."""
+        file = self._file
+
+        if file is None or file.closed:
+            return 0
+
+        return file.tell()
 
     async def _persist_json(self):
         logger.debug(f"Starting JSON persistence for {self.path}")
         entities = self._yield_entities_to_persist()
         file: BinaryIO | None = None
-        writer: jsonlines.Writer | None = None
-        type_adapter: TypeAdapter = TypeAdapter(Any)
 
         try:
             next_entity = await anext(entities)
 
             while self._truthy(next_entity):
-                # Use the first entity to determine the file's schema
-                if not file or not writer:
-                    file = await self._open()
-                    writer = jsonlines.Writer(
-                        file,
-                        dumps=lambda obj: json.dumps(  # type: ignore
-                            type_adapter.dump_python(obj), cls=MADJSONEncoder
-                        ),
-                    )
+                if isinstance(next_entity, (pa.Table, pa.RecordBatch)):
+                    # Arrow batches (e.g. from relations or other assets) are encoded
+                    # by DuckDB straight from their buffers, without python rows
+                    pool = await get_connection_pool(self.duckdb_settings)
 
-                table_or_batch: pa.RecordBatch | pa.Table = (
-                    next_entity
-                    if isinstance(next_entity, (pa.Table, pa.RecordBatch))
-                    else None
-                )
+                    with pool.cursor() as cursor:
+                        contents = encode_arrow_jsonl(cursor, next_entity)
+                else:
+                    # Encode the whole batch in one buffer, optionally off the event loop
+                    contents = [
+                        await run_serializer(
+                            self.serialization_executor,
+                            partial(encode_jsonl, encoder=self.json_encoder),
+                            next_entity,
+                        )
+                    ]
 
-                if table_or_batch:
-                    next_entity = table_or_batch.to_pylist()
+                for content in contents:
+                    if not content:
+                        continue
 
-                if not isinstance(next_entity, Sequence):
-                    next_entity = [next_entity]
+                    if not file:
+                        file = await self._open()
+
+                    file.write(content)
 
-                writer.write_all(next_entity)
                 next_entity = await anext(entities)
         except StopAsyncIteration:
             pass
         except Exception:
             raise
         finally:
-            if writer:
-                writer.close()
-
             if file:
                 file.close()
 
@@ -160,63 +235,80 @@ class DataArtifact:
         logger.debug(f"Finished JSON persistence for {self.path}")
 
     async def _persist_parquet(self):
-        logger.debug(f"Starting Parquet persistence for {self.path}")
-
-        def __sanitize_data(data):
-            """
-            Recursively go through the data and replace any empty dictionaries
-            with None or a dummy value to avoid Parquet serialization errors.
-            """
-            if isinstance(data, dict):
-                if not data:  # it's an empty dict
-                    return None  # or return {'dummy_field': None} to keep the key with a dummy field
-                else:
-                    return {key: __sanitize_data(value) for key, value in data.items()}
-            elif isinstance(data, list):
-                return [__sanitize_data(item) for item in data]
-            else:
-                return data
+        await self._persist_with_schema(
+            "Parquet",
+            lambda file, schema: pq.ParquetWriter(
+                file, schema, **self._parquet_writer_options()
+            ),
+            self._write_parquet,
+        )
+
+    async def _persist_arrow(self):
+        await self._persist_with_schema(
+            "Arrow IPC",
+            lambda file, schema: ipc.new_file(file, schema),
+            self._write_arrow,
+        )
+
+    async def _persist_with_schema(
+        self,
+        format_name: str,
+        open_writer: Callable[
+            [BinaryIO, pa.Schema], pq.ParquetWriter | ipc.RecordBatchFileWriter
+        ],
+        write: Callable[[Any, pa.Schema, pa.RecordBatch | pa.Table], None],
+    ):
+        logger.debug(f"Starting {format_name} persistence for {self.path}")
 
         entities = self._yield_entities_to_persist()
         file: BinaryIO | None = None
-        writer: pq.ParquetWriter | None = None
-        type_adapter = TypeAdapter(Any)
+        writer: pq.ParquetWriter | ipc.RecordBatchFileWriter | None = None
+        # The first batches are buffered to infer a schema which fits all of them,
+        # neither a Parquet nor an Arrow IPC file's schema can change once it's opened
+        buffered: list[pa.RecordBatch | pa.Table] = []
+        schema: pa.Schema | None = None
 
         try:
-            next_entity = await anext(entities)
+            while True:
+                try:
+                    next_entity = await anext(entities)
+                except StopAsyncIteration:
+                    next_entity = None
+
+                finished = not self._truthy(next_entity)
+
+                if not finished:
+                    table_or_batch: pa.RecordBatch | pa.Table = (
+                        next_entity
+                        if isinstance(next_entity, (pa.Table, pa.RecordBatch))
+                        else await run_serializer(
+                            self.serialization_executor, to_record_batch, next_entity
+                        )
+                    )
 
-            while self._truthy(next_entity):
-                b = __sanitize_data(next_entity)
-                table_or_batch: pa.RecordBatch | pa.Table = (
-                    b
-                    if isinstance(b, (pa.Table, pa.RecordBatch))
-                    else pa.RecordBatch.from_pylist(type_adapter.dump_python(b))
-                )
+                    if writer and schema:
+                        write(writer, schema, table_or_batch)
+                        continue
 
-                # Use the first entity to determine the file's schema
-                if not file or not writer:
+                    buffered.append(table_or_batch)
+
+                if buffered and (
+                    finished or len(buffered) >= self.schema_inference_batches
+                ):
+                    schema = unify_schema([batch.schema for batch in buffered])
+                    logger.debug(
+                        f"Inferred {format_name} schema for {self.path} from {len(buffered)} batches"
+                    )
                     file = await self._open()
-                    writer = pq.ParquetWriter(file, table_or_batch.schema)
-                else:
-                    # If schema has evolved, adjust the current RecordBatch
-                    if not table_or_batch.schema.equals(writer.schema):
-                        unified_schema = pa.unify_schemas(
-                            [writer.schema, table_or_batch.schema],
-                            promote_options="permissive",
-                        )
+                    writer = open_writer(file, schema)
 
-                        # Align the RecordBatch with the unified schema
-                        table_or_batch = table_or_batch.cast(unified_schema)
+                    for batch in buffered:
+                        write(writer, schema, batch)
 
-                        # Manually adjust the schema of the writer if needed
-                        writer.schema = unified_schema
+                    buffered = []
 
-                writer.write(table_or_batch)
-                next_entity = await anext(entities)
-        except StopAsyncIteration:
-            pass
-        except Exception:
-            raise
+                if finished:
+                    break
         finally:
             if writer:
                 writer.close()
@@ -225,13 +317,62 @@ class DataArtifact:
                 file.close()
 
             await entities.aclose()
-        logger.debug(f"Finished Parquet persistence for {self.path}")
+        logger.debug(f"Finished {format_name} persistence for {self.path}")
+
+    def _write_parquet(
+        self,
+        writer: pq.ParquetWriter,
+        schema: pa.Schema,
+        data: pa.RecordBatch | pa.Table,
+    ):
+        # Batches matching the file's schema are written as is, others are aligned
+        # (reordered, missing columns added as nulls, cast) or rejected
+        data = align_to_schema(data, schema)
+
+        # Unless set explicitly, row groups hold as many rows as a batch of the target size
+        row_group_size = self.write_parquet_options.row_group_size or rows_for_bytes(
+            data.nbytes / max(data.num_rows, 1), self.batch_bytes
+        )
+        writer.write(data, row_group_size=row_group_size)
+
+    def _write_arrow(
+        self,
+        writer: ipc.RecordBatchFileWriter,
+        schema: pa.Schema,
+        data: pa.RecordBatch | pa.Table,
+    ):
+        writer.write(align_to_schema(data, schema))
+
+    def _parquet_writer_options(self) -> dict:
+        options = self.write_parquet_options
+        writer_options = options.model_dump(
+            include={
+                "compression",
+                "compression_level",
+                "use_dictionary",
+                "write_statistics",
+                "write_page_index",
+            },
+            exclude_none=True,
+        )
+
+        if options.compression and options.compression.lower() == "uncompressed":
+            writer_options["compression"] = "none"
+
+        if options.bloom_filter_columns:
+            bloom_filter = (
+                {"fpp": options.bloom_filter_fpp} if options.bloom_filter_fpp else True
+            )
+            writer_options["bloom_filter_options"] = {
+                column: bloom_filter for column in options.bloom_filter_columns
+            }
+
+        return writer_options
 
     async def _persist_csv(self):
         logger.debug(f"Starting CSV persistence for {self.path}")
         entities = self._yield_entities_to_persist()
         file: BinaryIO | None = None
-        type_adapter = TypeAdapter(Any)
         first_chunk = True  # Track whether we need to write CSV headers
 
         try:
@@ -241,8 +382,8 @@ class DataArtifact:
                 # If it's already a pa.Table or pa.RecordBatch, use it.
                 # Otherwise, convert it to a Table from a list-of-dicts or list-of-rows.
                 if not isinstance(next_entity, (pa.Table, pa.RecordBatch)):
-                    next_entity = pa.Table.from_pylist(
-                        type_adapter.dump_python(next_entity)
+                    next_entity = await run_serializer(
+                        self.serialization_executor, to_table, next_entity
                     )
 
                 # If the file isn't open yet, open it
@@ -268,14 +409,18 @@ class DataArtifact:
         logger.debug(f"Finished CSV persistence for {self.path}")
 
     async def _yield_entities_to_persist(self):
-        from mad_prefect.data_assets.data_asset import DataAsset
+        from mad_prefect.data_assets.asset_scheduler import schedule_yielded_assets
+
+        # Consecutive DataAssets are materialized concurrently, they arrive here as
+        # tasks in the order they were yielded
+        batches = schedule_yielded_assets(yield_data_batches(self.data))
 
-        async for batch_data in yield_data_batches(self.data):
-            if isinstance(batch_data, DataAsset):
+        async for batch_data in batches:
+            if isinstance(batch_data, asyncio.Future):
                 logger.debug(
-                    "Processing artifact data batch - Data format: DataAsset, converting to DataArtifact"
+                    "Processing artifact data batch - Data format: scheduled DataAsset, awaiting its DataArtifact"
                 )
-                batch_data = await batch_data()
+                batch_data = await batch_data
 
             if isinstance(batch_data, DataArtifact):
                 logger.debug(
@@ -292,23 +437,28 @@ class DataArtifact:
                 logger.debug(
                     "Processing artifact data batch - Data format: pd.DataFrame, converting to DuckDB relation"
                 )
-                batch_data = duckdb.from_df(batch_data)
+                # Stream the DataFrame on a cursor of its own, it's only returned to the
+                # pool once the reader is closed so other queries can't truncate it
+                pool = await get_connection_pool(self.duckdb_settings)
+                cursor = pool.acquire()
+                batch_data = cursor.from_df(batch_data)
+            else:
+                pool = cursor = None
 
             if isinstance(batch_data, (duckdb.DuckDBPyRelation)):
                 logger.debug(
                     "Processing artifact data batch - Data format: DuckDB relation, streaming as Arrow record batches"
                 )
-                reader = batch_data.fetch_arrow_reader(1000)
+                reader, batches = read_sized_batches(batch_data, self.batch_bytes)
                 try:
-                    while True:
-                        try:
-                            batch = reader.read_next_batch()
-                            yield batch
-                        except StopIteration:
-                            break
+                    for batch in batches:
+                        yield batch
                 finally:
                     reader.close()
 
+                    if pool and cursor:
+                        pool.release(cursor)
+
             elif isinstance(batch_data, httpx.Response):
                 logger.debug(
                     "Processing artifact data batch - Data format: httpx.Response, extracting JSON content"
@@ -320,12 +470,62 @@ class DataArtifact:
                 )
                 yield batch_data
 
+    @property
+    def batch_bytes(self) -> int:
+        return self.target_batch_bytes or DEFAULT_TARGET_BATCH_BYTES
+
+    def copy_options(self, source: Callable[[], duckdb.DuckDBPyRelation]) -> str:
+        """
+        Options for a DuckDB `COPY` of the `source` relation to this artifact.
+
+        Parquet files are written with `write_parquet_options`. Unless a row group
+        size is set there, row groups are sized from `target_batch_bytes` when it's
+        set, otherwise DuckDB's default row group size is kept. `source` is only
+        built when its column types are needed.
+        """
+        options = [f"FORMAT {COPY_FORMATS[self.filetype]}"]
+
+        if self.compression:
+            options.append(f"COMPRESSION {self.compression}")
+
+        if self.filetype != "parquet":
+            return f"({', '.join(options)})"
+
+        parquet_options = self.write_parquet_options
+
+        if parquet_options.compression:
+            options.append(f"COMPRESSION {parquet_options.compression}")
+
+        if parquet_options.compression_level is not None:
+            options.append(f"COMPRESSION_LEVEL {parquet_options.compression_level}")
+
+        if parquet_options.row_group_size:
+            options.append(f"ROW_GROUP_SIZE {parquet_options.row_group_size}")
+        elif self.target_batch_bytes:
+            row_group_size = rows_for_bytes(
+                estimate_row_bytes(source()), self.target_batch_bytes
+            )
+            options.append(f"ROW_GROUP_SIZE {row_group_size}")
+
+        if parquet_options.use_dictionary is False:
+            options.append("DICTIONARY_SIZE_LIMIT 0")
+
+        if parquet_options.bloom_filter_fpp:
+            options.append(
+                f"BLOOM_FILTER_FALSE_POSITIVE_RATIO {parquet_options.bloom_filter_fpp}"
+            )
+
+        return f"({', '.join(options)})"
+
     async def query(self, query_str: str | None = None, params: object | None = None):
         from mad_prefect.data_assets.data_artifact_query import DataArtifactQuery
 
         logger.info(f"Querying artifact: {self.path}")
         artifact_query = DataArtifactQuery(
-            [self], self.read_json_options, self.read_csv_options
+            [self],
+            self.read_json_options,
+            self.read_csv_options,
+            duckdb_settings=self.duckdb_settings,
         )
         return await artifact_query.query(query_str, params=params)
 
@@ -1,11 +1,39 @@
+import asyncio
+from collections import deque
 import logging
-from mad_prefect.data_assets import ARTIFACT_FILE_TYPES
-from mad_prefect.data_assets.options import ReadCSVOptions, ReadJsonOptions
-from mad_prefect.data_assets.utils import yield_data_batches
+import pandas as pd
+import pyarrow as pa
+from mad_prefect.data_assets import ARTIFACT_COMPRESSIONS, ARTIFACT_FILE_TYPES
+from mad_prefect.data_assets.artifact_paths import artifact_suffix
+from mad_prefect.data_assets.asset_scheduler import schedule_yielded_assets
+from mad_prefect.data_assets.options import (
+    ReadCSVOptions,
+    ReadJsonOptions,
+    WriteParquetOptions,
+)
+from mad_prefect.data_assets.serialization import (
+    JSON_ENCODERS,
+    SERIALIZATION_EXECUTORS,
+)
+from mad_prefect.data_assets.utils import safe_truthy, yield_data_batches
 from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.duckdb import DuckDBSettings
 
 logger = logging.getLogger(__name__)
 
+_COLLECT_DONE = object()
+
+
+def _count_rows(fragment: object) -> int:
+    # Rows of fragments which can be counted without reading them, e.g. not relations
+    if isinstance(fragment, (pa.Table, pa.RecordBatch)):
+        return fragment.num_rows
+    if isinstance(fragment, (list, pd.DataFrame)):
+        return len(fragment)
+    if isinstance(fragment, dict):
+        return 1
+    return 0
+
 
 class DataArtifactCollector:
 
@@ -17,51 +45,253 @@ class DataArtifactCollector:
         artifacts: list[DataArtifact] | None = None,
         read_json_options: ReadJsonOptions | None = None,
         read_csv_options: ReadCSVOptions | None = None,
+        max_in_flight_persists: int = 1,
+        serialization_executor: SERIALIZATION_EXECUTORS | None = None,
+        duckdb_settings: DuckDBSettings | None = None,
+        target_batch_bytes: int | None = None,
+        json_encoder: JSON_ENCODERS | None = None,
+        schema_inference_batches: int | None = None,
+        write_parquet_options: WriteParquetOptions | None = None,
+        compression: ARTIFACT_COMPRESSIONS | None = None,
+        fragment_target_rows: int | None = None,
+        fragment_target_bytes: int | None = None,
     ):
+        if max_in_flight_persists < 1:
+            raise ValueError("max_in_flight_persists must be at least 1")
+
+        if fragment_target_rows is not None and fragment_target_rows < 1:
+            raise ValueError("fragment_target_rows must be at least 1")
+
+        if fragment_target_bytes is not None and fragment_target_bytes < 1:
+            raise ValueError("fragment_target_bytes must be at least 1")
+
+        # Fail before the asset runs when the compression doesn't suit the filetype
+        self.suffix = artifact_suffix(filetype, compression)
+
         self.collector = collector
         self.dir = dir
         self.filetype = filetype
         self.artifacts = artifacts or []
         self.read_json_options = read_json_options or ReadJsonOptions()
         self.read_csv_options = read_csv_options or ReadCSVOptions()
+        self.max_in_flight_persists = max_in_flight_persists
+        self.serialization_executor: SERIALIZATION_EXECUTORS | None = (
+            serialization_executor
+        )
+        self.duckdb_settings = duckdb_settings
+        self.target_batch_bytes = target_batch_bytes
+        self.json_encoder: JSON_ENCODERS | None = json_encoder
+        self.schema_inference_batches = schema_inference_batches
+        self.write_parquet_options = write_parquet_options
+        self.compression: ARTIFACT_COMPRESSIONS | None = compression
+        self.fragment_target_rows = fragment_target_rows
+        self.fragment_target_bytes = fragment_target_bytes
+
+    @property
+    def coalesce(self) -> bool:
+        return bool(self.fragment_target_rows or self.fragment_target_bytes)
 
     async def collect(self):
-        logger.info(f"Starting artifact collection into directory: {self.dir}")
+        logger.info(
+            f"Starting artifact collection into directory: {self.dir} (max in-flight persists: {self.max_in_flight_persists})"
+        )
+
+        if self.coalesce:
+            await self._collect_coalesced()
+            logger.info(
+                f"Finished artifact collection. Collected {len(self.artifacts)} artifacts."
+            )
+            return self.artifacts
+
         fragment_num = 0
 
-        async for fragment in yield_data_batches(self.collector):
+        # Persists are queued in the order fragments are yielded so the collected
+        # artifacts keep the same order regardless of which write finishes first
+        in_flight: deque[tuple[DataArtifact, asyncio.Task[bool]]] = deque()
+        # Yielded DataAssets are materialized ahead, consecutive ones concurrently
+        fragments = schedule_yielded_assets(yield_data_batches(self.collector))
+
+        try:
+            async for fragment in fragments:
+                logger.debug(
+                    f"Processing fragment #{fragment_num} of type {type(fragment)}"
+                )
+                # If the output isn't a DataArtifact manually set the params & base_path
+                # and initialize the output as a DataArtifact
+                if isinstance(fragment, DataArtifact):
+                    fragment_artifact = fragment
+                elif not safe_truthy(fragment):
+                    # Skip empty fragments before numbering them so fragment numbers
+                    # are assigned deterministically in the order they're yielded
+                    logger.warning(
+                        f"Did not persist fragment #{fragment_num}, it was empty."
+                    )
+                    continue
+                else:
+                    path = self._build_artifact_path(
+                        self.dir, fragment_number=fragment_num
+                    )
+                    logger.debug(
+                        f"Creating new DataArtifact for fragment at path: {path}"
+                    )
+                    fragment_artifact = self._create_artifact(path, fragment)
+                    fragment_num += 1
+
+                in_flight.append(
+                    (fragment_artifact, asyncio.create_task(fragment_artifact.persist()))
+                )
+
+                # Apply backpressure to the producer until there is room in the queue
+                while len(in_flight) >= self.max_in_flight_persists:
+                    await self._complete_oldest_persist(in_flight)
+
+            while in_flight:
+                await self._complete_oldest_persist(in_flight)
+        finally:
+            # If the producer or a persist failed, don't leave orphaned writes behind
+            for _, task in in_flight:
+                task.cancel()
+
+            await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+            await fragments.aclose()
+
+        logger.info(
+            f"Finished artifact collection. Collected {len(self.artifacts)} artifacts."
+        )
+        return self.artifacts
+
+    async def _complete_oldest_persist(
+        self,
+        in_flight: deque[tuple[DataArtifact, asyncio.Task[bool]]],
+    ):
+        fragment_artifact, task = in_flight[0]
+        persisted = await task
+        in_flight.popleft()
+
+        if persisted:
             logger.debug(
-                f"Processing fragment #{fragment_num} of type {type(fragment)}"
+                f"Successfully persisted fragment artifact: {fragment_artifact.path}"
+            )
+            self.artifacts.append(fragment_artifact)
+        else:
+            logger.warning(
+                f"Did not persist fragment artifact for path: {fragment_artifact.path}, it may have been empty."
             )
-            # If the output isn't a DataArtifact manually set the params & base_path
-            # and initialize the output as a DataArtifact
+
+    async def _collect_coalesced(self):
+        """
+        Write consecutive fragments into the same file until it reaches
+        `fragment_target_rows` or `fragment_target_bytes`, then roll to the next.
+
+        Fragments are streamed to the open file as they're yielded, through a queue
+        of `max_in_flight_persists` fragments so the producer keeps fetching while
+        the writer catches up. Files keep contiguous `fragment=N` numbers.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_in_flight_persists)
+        writer = asyncio.create_task(self._persist_coalesced(queue))
+        fragments = schedule_yielded_assets(yield_data_batches(self.collector))
+
+        try:
+            async for fragment in fragments:
+                if not isinstance(fragment, DataArtifact) and not safe_truthy(fragment):
+                    logger.warning("Did not persist fragment, it was empty.")
+                    continue
+
+                await self._put_fragment(queue, writer, fragment)
+
+            await self._put_fragment(queue, writer, _COLLECT_DONE)
+            await writer
+        finally:
+            # If the producer failed, don't leave an orphaned write behind
+            if not writer.done():
+                writer.cancel()
+
+            await asyncio.gather(writer, return_exceptions=True)
+            await fragments.aclose()
+
+    async def _put_fragment(
+        self, queue: asyncio.Queue, writer: asyncio.Task, fragment: object
+    ):
+        put = asyncio.ensure_future(queue.put(fragment))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+
+        # The writer only stops early when it fails, surface its error
+        if not put.done():
+            put.cancel()
+            writer.result()
+
+    async def _persist_coalesced(self, queue: asyncio.Queue):
+        # The fragment the current file stopped before, it starts the next file
+        pending: list[object] = [await queue.get()]
+        fragment_num = 0
+
+        while (fragment := pending[0]) is not _COLLECT_DONE:
             if isinstance(fragment, DataArtifact):
+                # Yielded artifacts are persisted as they are, between coalesced files
+                pending[0] = await queue.get()
                 fragment_artifact = fragment
             else:
                 path = self._build_artifact_path(self.dir, fragment_number=fragment_num)
-                logger.debug(f"Creating new DataArtifact for fragment at path: {path}")
-                fragment_artifact = DataArtifact(
-                    path,
-                    fragment,
-                    self.read_json_options,
-                    self.read_csv_options,
+                logger.debug(f"Coalescing fragments into DataArtifact at path: {path}")
+                fragment_artifact = self._create_artifact(path, None)
+                fragment_artifact.data = self._coalesce_fragments(
+                    queue, pending, fragment_artifact
                 )
+                fragment_num += 1
 
             if await fragment_artifact.persist():
                 logger.debug(
                     f"Successfully persisted fragment artifact: {fragment_artifact.path}"
                 )
                 self.artifacts.append(fragment_artifact)
-                fragment_num += 1
             else:
                 logger.warning(
                     f"Did not persist fragment artifact for path: {fragment_artifact.path}, it may have been empty."
                 )
 
-        logger.info(
-            f"Finished artifact collection. Collected {len(self.artifacts)} artifacts."
+    async def _coalesce_fragments(
+        self, queue: asyncio.Queue, pending: list[object], artifact: DataArtifact
+    ):
+        fragments = rows = 0
+
+        while (fragment := pending[0]) is not _COLLECT_DONE and not isinstance(
+            fragment, DataArtifact
+        ):
+            # Checked once the previous fragment has been written, every file takes at
+            # least one fragment
+            if fragments and self._reached_target(rows, artifact):
+                logger.debug(
+                    f"Rolling to the next file after {fragments} fragments ({rows} rows, {artifact.bytes_written} bytes)."
+                )
+                return
+
+            pending[0] = await queue.get()
+            fragments += 1
+            rows += _count_rows(fragment)
+            yield fragment
+
+    def _reached_target(self, rows: int, artifact: DataArtifact) -> bool:
+        if self.fragment_target_rows and rows >= self.fragment_target_rows:
+            return True
+
+        return bool(
+            self.fragment_target_bytes
+            and artifact.bytes_written >= self.fragment_target_bytes
+        )
+
+    def _create_artifact(self, path: str, data: object) -> DataArtifact:
+        return DataArtifact(
+            path,
+            data,
+            self.read_json_options,
+            self.read_csv_options,
+            self.serialization_executor,
+            self.duckdb_settings,
+            self.target_batch_bytes,
+            self.json_encoder,
+            self.schema_inference_batches,
+            self.write_parquet_options,
         )
-        return self.artifacts
 
     def _build_artifact_path(
         self,
@@ -69,14 +299,14 @@ class DataArtifactCollector:
         params: dict | None = None,
         fragment_number: int | None = None,
     ):
-        filetype = self.filetype
+        suffix = self.suffix
         base_path = base_path.rstrip("/")
 
         if params is None:
-            path = f"{base_path}/fragment={fragment_number}.{filetype}"
+            path = f"{base_path}/fragment={fragment_number}{suffix}"
         else:
             params_path = "/".join(f"{key}={value}" for key, value in params.items())
-            path = f"{base_path}/{params_path}.{filetype}"
+            path = f"{base_path}/{params_path}{suffix}"
 
         logger.debug(f"Built artifact path: {path}")
         return path
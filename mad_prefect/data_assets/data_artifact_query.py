@@ -1,10 +1,20 @@
 import logging
-from typing import cast
+import os
+from functools import partial
+from typing import Callable, cast
+from uuid import uuid4
 import duckdb
+from fsspec.implementations.local import LocalFileSystem
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 from mad_prefect.data_assets import ARTIFACT_FILE_TYPES
 from mad_prefect.data_assets.options import ReadCSVOptions, ReadJsonOptions
-from mad_prefect.duckdb import register_mad_protocol
-from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.duckdb import DuckDBSettings, get_connection_pool
+from mad_prefect.data_assets.batching import read_sized_batches
+from mad_prefect.data_assets.data_artifact import COPY_FORMATS, DataArtifact
+from mad_prefect.data_assets.serialization import unify_schema
+from mad_prefect.data_assets.utils import fan_out
+from mad_prefect.filesystems import FsspecFileSystem, get_fs
 
 logger = logging.getLogger(__name__)
 
@@ -16,17 +26,16 @@ class DataArtifactQuery:
         artifacts: list[DataArtifact] | None = None,
         read_json_options: ReadJsonOptions | None = None,
         read_csv_options: ReadCSVOptions | None = None,
+        duckdb_settings: DuckDBSettings | None = None,
     ):
         self.artifacts = artifacts or []
         self.read_json_options = read_json_options or ReadJsonOptions()
         self.read_csv_options = read_csv_options or ReadCSVOptions()
+        self.duckdb_settings = duckdb_settings
+        self._fs: FsspecFileSystem | None = None
 
     async def query(self, query_str: str | None = None, params: object | None = None):
-        await register_mad_protocol()
-
-        # Skip redundant existence checks; rely on persist() marking artifacts as persisted.
-        existing_artifacts = [a for a in self.artifacts if a.persisted]
-        artifact_paths = [f"mad://{a.path.strip('/')}" for a in existing_artifacts]
+        artifact_paths, filetype = self._get_artifact_paths()
 
         if not artifact_paths:
             logger.warning(
@@ -36,6 +45,108 @@ class DataArtifactQuery:
 
         logger.info(f"Starting query across {len(artifact_paths)} artifact paths.")
         logger.debug(f"Querying paths: {artifact_paths}")
+        self._fs = await get_fs()
+
+        # Relations are created on the pool's connection, which outlives them. For the
+        # default pool that's DuckDB's default connection, so callers can keep using
+        # the relation in `duckdb.query` and replacement scans. Assets with their own
+        # DuckDB settings get a pool (and database) of their own, so their limits
+        # don't leak to other assets
+        pool = await get_connection_pool(self.duckdb_settings)
+        connection = pool.connection
+        artifact_query = connection.query(
+            self._build_query(connection, filetype, artifact_paths)
+        )
+
+        # Apply any additional query on top
+        if query_str:
+            final_query_string = f"FROM artifact_query {query_str}"
+            logger.debug(f"Executing final query: {final_query_string}")
+            artifact_query = connection.query(final_query_string, params=params)
+        else:
+            logger.debug("Executing base artifact query.")
+
+        return pool.track(artifact_query)
+
+    async def copy_to(self, result_artifacts: list[DataArtifact]) -> bool:
+        """
+        Write the union of the artifacts straight to `result_artifacts`.
+
+        A single result is written with one `COPY (SELECT ... FROM read_*([...]))`, so
+        the fragments never pass through Python. With several formats, or an Arrow
+        IPC result, the fragments are scanned once and each Arrow batch is fanned out
+        to every result's writer.
+        """
+        artifact_paths, filetype = self._get_artifact_paths()
+
+        if not artifact_paths or not result_artifacts:
+            logger.warning(
+                "Copy attempted on an artifact collection with no existing files. Skipping."
+            )
+            return False
+
+        pool = await get_connection_pool(self.duckdb_settings)
+        fs = self._fs = await get_fs()
+
+        with pool.cursor() as cursor:
+            source_query = self._build_query(cursor, filetype, artifact_paths)
+
+            if (
+                len(result_artifacts) == 1
+                and result_artifacts[0].filetype in COPY_FORMATS
+            ):
+                result_artifact = result_artifacts[0]
+                logger.info(
+                    f"Copying {len(artifact_paths)} artifact paths to {result_artifact.path}."
+                )
+                copy_target = self._copy_target(
+                    fs, result_artifact, lambda: cursor.query(source_query)
+                )
+                cursor.execute(f"COPY ({source_query}) TO {copy_target}")
+                return await result_artifact.exists()
+
+            logger.info(
+                f"Writing {len(artifact_paths)} artifact paths to {len(result_artifacts)} result artifacts in one scan."
+            )
+            # Result artifacts share the asset's options, so any of them sets the size
+            reader, batches = read_sized_batches(
+                cursor.query(source_query), result_artifacts[0].batch_bytes
+            )
+
+            async def persist_branch(artifact: DataArtifact, batches):
+                artifact.data = batches
+                return await artifact.persist()
+
+            try:
+                persisted = await fan_out(
+                    batches,
+                    [partial(persist_branch, a) for a in result_artifacts],
+                )
+            finally:
+                reader.close()
+
+        return all(persisted)
+
+    def _copy_target(
+        self,
+        fs: FsspecFileSystem,
+        artifact: DataArtifact,
+        source: Callable[[], duckdb.DuckDBPyRelation],
+    ) -> str:
+        # Like DataArtifact.persist, write through the wrapped filesystem (registered
+        # with every pool) rather than the mad protocol, see test_overwriting_existing_file
+        fs.mkdirs(os.path.dirname(artifact.path), exist_ok=True)
+        path = fs._resolve_path(artifact.path)
+
+        return f"'{fs._protocol}://{path}' {artifact.copy_options(source)}"
+
+    def _get_artifact_paths(self) -> tuple[list[str], ARTIFACT_FILE_TYPES]:
+        # Skip redundant existence checks; rely on persist() marking artifacts as persisted.
+        existing_artifacts = [a for a in self.artifacts if a.persisted]
+        artifact_paths = [f"mad://{a.path.strip('/')}" for a in existing_artifacts]
+
+        if not artifact_paths:
+            return [], "json"
 
         # Ensure each artifact is of the same filetype
         filetypes = set([a.filetype for a in existing_artifacts])
@@ -47,25 +158,30 @@ class DataArtifactQuery:
         filetype: ARTIFACT_FILE_TYPES = cast(ARTIFACT_FILE_TYPES, filetypes.pop())
         logger.debug(f"Determined artifact filetype for query: {filetype}")
 
+        return artifact_paths, filetype
+
+    def _build_query(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        filetype: ARTIFACT_FILE_TYPES,
+        artifact_paths: list[str],
+    ) -> str:
         if filetype == "json":
-            artifact_query = self._create_query_json(artifact_paths)
+            return self._build_query_json(connection, artifact_paths)
         elif filetype == "parquet":
-            artifact_query = self._create_query_parquet(artifact_paths)
+            return self._build_query_parquet(connection, artifact_paths)
         elif filetype == "csv":
-            artifact_query = self._create_query_csv(artifact_paths)
+            return self._build_query_csv(connection, artifact_paths)
+        elif filetype == "arrow":
+            return self._build_query_arrow(connection, artifact_paths)
         else:
             raise ValueError(f"Unsupported file format {filetype}")
 
-        # Apply any additional query on top
-        if query_str:
-            final_query_string = f"FROM artifact_query {query_str}"
-            logger.debug(f"Executing final query: {final_query_string}")
-            return duckdb.query(final_query_string, params=params)
-
-        logger.debug("Executing base artifact query.")
-        return artifact_query
-
-    def _create_query_json(self, artifact_paths: list[str]):
+    def _build_query_json(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        artifact_paths: list[str],
+    ) -> str:
         # Prepare the globs string
         artifact_paths_str = ", ".join(f"'{g}'" for g in artifact_paths)
         artifact_paths_formatted = f"[{artifact_paths_str}]"
@@ -90,7 +206,7 @@ class DataArtifactQuery:
         # Process columns after building the base query
         if self.read_json_options.columns:
             updated_columns = self._process_columns(
-                base_query, self.read_json_options.columns
+                connection, base_query, self.read_json_options.columns
             )
 
             # Include 'columns' in options
@@ -103,19 +219,18 @@ class DataArtifactQuery:
         else:
             final_query = base_query
 
-        # Execute the query
         logger.debug(f"Generated DuckDB JSON query: {final_query}")
-        artifact_query = duckdb.query(final_query)
-        return artifact_query
+        return final_query
 
     def _process_columns(
         self,
+        connection: duckdb.DuckDBPyConnection,
         base_query: str,
         columns: dict[str, str],
     ) -> dict[str, str]:
         # Describe the base query to get the schema
         logger.debug("Describing base query to determine schema for column processing.")
-        schema_info = duckdb.query(f"DESCRIBE {base_query}").fetchall()
+        schema_info = connection.query(f"DESCRIBE {base_query}").fetchall()
         schema_columns = {row[0]: row[1] for row in schema_info}
         logger.debug(f"Inferred schema columns: {schema_columns}")
 
@@ -132,7 +247,11 @@ class DataArtifactQuery:
         logger.debug(f"Final columns for query: {updated_columns}")
         return updated_columns
 
-    def _create_query_parquet(self, artifact_paths: list[str]):
+    def _build_query_parquet(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        artifact_paths: list[str],
+    ) -> str:
         # Prepare the globs string
         artifact_paths_str = ", ".join(f"'{g}'" for g in artifact_paths)
         artifact_paths_formatted = f"[{artifact_paths_str}]"
@@ -146,12 +265,14 @@ class DataArtifactQuery:
             f"SELECT * FROM read_parquet({artifact_paths_formatted}, {options_str})"
         )
 
-        # Execute the query
         logger.debug(f"Generated DuckDB Parquet query: {artifact_base_query}")
-        artifact_query = duckdb.query(artifact_base_query)
-        return artifact_query
+        return artifact_base_query
 
-    def _create_query_csv(self, artifact_paths: list[str]):
+    def _build_query_csv(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        artifact_paths: list[str],
+    ) -> str:
         # Convert each artifact path to a DuckDB-friendly string
         artifact_paths_str = ", ".join(f"'{g}'" for g in artifact_paths)
         artifact_paths_formatted = f"[{artifact_paths_str}]"
@@ -173,10 +294,41 @@ class DataArtifactQuery:
             else f"SELECT * FROM read_csv({artifact_paths_formatted})"
         )
 
-        # Execute the query
         logger.debug(f"Generated DuckDB CSV query: {base_query}")
-        artifact_query = duckdb.query(base_query)
-        return artifact_query
+        return base_query
+
+    def _build_query_arrow(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        artifact_paths: list[str],
+    ) -> str:
+        # DuckDB can't read Arrow IPC files itself, so the fragments are opened as a
+        # pyarrow dataset which DuckDB scans in place (with projection and filter
+        # pushdown). Local files are memory-mapped rather than read into memory.
+        fs = self._fs
+
+        if fs is None:
+            raise ValueError("The filesystem must be loaded before querying artifacts")
+
+        if isinstance(fs._fs, LocalFileSystem):
+            arrow_fs: pafs.FileSystem = pafs.LocalFileSystem(use_mmap=True)
+        else:
+            arrow_fs = pafs.PyFileSystem(pafs.FSSpecHandler(fs._fs))
+
+        paths = [fs._resolve_path(p.removeprefix("mad://")) for p in artifact_paths]
+        dataset = ds.dataset(paths, format="ipc", filesystem=arrow_fs)
+
+        # Like union_by_name, columns missing from a fragment are read as nulls
+        schema = unify_schema([f.physical_schema for f in dataset.get_fragments()])
+        dataset = ds.dataset(paths, schema=schema, format="ipc", filesystem=arrow_fs)
+
+        # The view lives as long as the connection, relations built on it reference it by name
+        view_name = f"arrow_artifacts_{uuid4().hex}"
+        connection.register(view_name, dataset)
+
+        artifact_base_query = f"SELECT * FROM {view_name}"
+        logger.debug(f"Generated DuckDB Arrow query: {artifact_base_query}")
+        return artifact_base_query
 
     def _format_options_dict(self, options_dict: dict) -> str:
         def format_value(key, value):
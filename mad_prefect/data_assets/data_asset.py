@@ -4,6 +4,10 @@ import hashlib
 import logging
 import re
 from typing import Callable, Generic, ParamSpec, TypeVar, overload
+from mad_prefect.data_assets.compaction import (
+    DEFAULT_MIN_FRAGMENTS,
+    PartitionCompaction,
+)
 from mad_prefect.data_assets.data_artifact import DataArtifact
 from mad_prefect.data_assets.data_artifact_query import DataArtifactQuery
 from mad_prefect.data_assets.data_asset_options import DataAssetOptions
@@ -64,10 +68,19 @@ class DataAsset(Generic[P, R]):
             [result_artifact],
             self.options.read_json_options,
             self.options.read_csv_options,
+            duckdb_settings=self.options.duckdb_settings,
         )
 
         return await artifact_query.query(query_str, params=params)
 
+    async def compact(
+        self,
+        target_file_bytes: int | None = None,
+        min_fragments: int = DEFAULT_MIN_FRAGMENTS,
+    ) -> list[PartitionCompaction]:
+        """Merge the small fragment files in the asset's artifact directories, see `compact_artifacts`."""
+        return await self._callable.compact(target_file_bytes, min_fragments)
+
     @cached_property
     def id(self):
         hash_input = f"{self.name}:{self.path}:{self.options.artifacts_dir}:{str(self._callable.args)}{str(self._callable.keywords)}"
@@ -1,12 +1,20 @@
+import asyncio
 from datetime import UTC, datetime, timedelta, timezone
 from functools import partial
 import hashlib
 import inspect
 import logging
 import os
-from pathlib import Path
 from typing import Generic, ParamSpec, TypeVar, cast
-import duckdb
+import weakref
+from mad_prefect.data_assets.artifact_paths import split_artifact_suffixes
+from mad_prefect.data_assets.asset_lock import AssetLock
+from mad_prefect.data_assets.asset_scheduler import AssetScheduler
+from mad_prefect.data_assets.compaction import (
+    DEFAULT_MIN_FRAGMENTS,
+    PartitionCompaction,
+    compact_artifacts,
+)
 from mad_prefect.data_assets.data_artifact import DataArtifact
 from mad_prefect.data_assets.data_artifact_collector import DataArtifactCollector
 from mad_prefect.data_assets.data_artifact_query import DataArtifactQuery
@@ -17,6 +25,7 @@ from mad_prefect.data_assets.asset_metadata import (
     get_asset_metadata,
     load_asset_manifest,
 )
+from mad_prefect.data_assets.run_history import get_last_successful_materialization
 from mad_prefect.data_assets.utils import safe_truthy
 from mad_prefect.filesystems import get_fs
 from mad_prefect.data_assets.data_asset import DataAsset
@@ -27,6 +36,11 @@ R = TypeVar("R", covariant=True)
 
 logger = logging.getLogger(__name__)
 
+# Materializations running in this process by event loop, keyed by asset id
+_in_flight_materializations: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Future[DataArtifact]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 class DataAssetCallable(Generic[P, R]):
     def __init__(self, asset: DataAsset[P, R]):
@@ -74,19 +88,57 @@ class DataAssetCallable(Generic[P, R]):
             asset = asset.with_arguments(*args, **kwargs)
             return await asset()
 
-        bound_args = self.get_bound_arguments()
-        logger.debug(
-            f"Bound arguments for asset '{asset.name}': {bound_args.arguments}"
-        )
+        self._format_asset(asset)
 
-        formatter = AssetTemplateFormatter(self.args, bound_args)
-        asset.name = formatter.format(asset.name) or ""
-        asset.path = formatter.format(asset.path) or ""
-        asset.options.artifacts_dir = (
-            formatter.format(asset.options.artifacts_dir) or ""
-        )
-        logger.debug(f"Formatted asset name: '{asset.name}', path: '{asset.path}'")
+        # Inside a scheduler, assets awaited by asset code are materialized once
+        scheduler = AssetScheduler.current()
+
+        if scheduler and not scheduler.is_running(asset):
+            return await scheduler.materialize(asset)
+
+        # Concurrent calls for the same asset id share one materialization, rather
+        # than calling the asset twice and racing on its artifact directories
+        loop = asyncio.get_running_loop()
+        in_flight = _in_flight_materializations.setdefault(loop, {})
 
+        while (materialization := in_flight.get(asset.id)) is not None:
+            logger.info(
+                f"Asset '{asset.name}' is already being materialized (asset_id: {asset.id}). Awaiting its result."
+            )
+
+            try:
+                return await asyncio.shield(materialization)
+            except asyncio.CancelledError:
+                current_task = asyncio.current_task()
+
+                # The caller materializing the asset was cancelled, this caller wasn't
+                if not materialization.cancelled() or (
+                    current_task and current_task.cancelling()
+                ):
+                    raise
+
+        materialization = loop.create_future()
+        in_flight[asset.id] = materialization
+
+        try:
+            result_artifact = await self._materialize(asset)
+        except Exception as exc:
+            materialization.set_exception(exc)
+            # Mark the error retrieved, it's raised to this caller as well
+            materialization.exception()
+            raise
+        except BaseException:
+            # Cancelled, waiting callers materialize the asset themselves
+            materialization.cancel()
+            raise
+        else:
+            materialization.set_result(result_artifact)
+            return result_artifact
+        finally:
+            if in_flight.get(asset.id) is materialization:
+                del in_flight[asset.id]
+
+    async def _materialize(self, asset: DataAsset) -> DataArtifact:
         self.asset_run = asset_run = DataAssetRun()
         asset_run.id = self._generate_asset_iteration_guid()
         asset_run.asset_id = asset.id
@@ -124,6 +176,22 @@ class DataAssetCallable(Generic[P, R]):
         ):
             return self.result_artifacts[0]
 
+        if not asset.options.materialization_lock:
+            return await self._execute(asset, asset_run)
+
+        # One process at a time materializes the asset, the others wait for its
+        # lease and reuse the result it materialized
+        async with AssetLock(asset.name, asset.id) as lock:
+            if lock.waited:
+                if await self._materialized_since(asset, asset_run.runtime):
+                    return self.result_artifacts[0]
+
+                # The wait isn't part of this run
+                asset_run.runtime = datetime.now(UTC)
+
+            return await self._execute(asset, asset_run)
+
+    async def _execute(self, asset: DataAsset, asset_run: DataAssetRun) -> DataArtifact:
         # Regenerate asset_run_id as runtime has now been set.
         asset_run.id = self._generate_asset_iteration_guid()
         logger.debug(f"Regenerated asset run ID with runtime: {asset_run.id}")
@@ -160,6 +228,16 @@ class DataAssetCallable(Generic[P, R]):
             asset.options.artifact_filetype,
             read_json_options=asset.options.read_json_options,
             read_csv_options=asset.options.read_csv_options,
+            max_in_flight_persists=asset.options.max_in_flight_persists,
+            serialization_executor=asset.options.serialization_executor,
+            duckdb_settings=asset.options.duckdb_settings,
+            target_batch_bytes=asset.options.target_batch_bytes,
+            json_encoder=asset.options.json_encoder,
+            schema_inference_batches=asset.options.schema_inference_batches,
+            write_parquet_options=asset.options.write_parquet_options,
+            compression=asset.options.artifact_compression,
+            fragment_target_rows=asset.options.fragment_target_rows,
+            fragment_target_bytes=asset.options.fragment_target_bytes,
         )
 
         # Collect the artifacts yielded from the materialization fn
@@ -175,19 +253,12 @@ class DataAssetCallable(Generic[P, R]):
             artifacts=collector_artifacts,
             read_json_options=asset.options.read_json_options,
             read_csv_options=asset.options.read_csv_options,
+            duckdb_settings=asset.options.duckdb_settings,
         )
 
-        # The result is all the artifacts unioned
-        result_artifact_data = await artifact_query.query()
-
-        for result_artifact in self.result_artifacts:
-            result_artifact.data = result_artifact_data
-
-            # Persist the result artifact to storage, fully materialize it
-            await result_artifact.persist()
-
-        # Release reference to data
-        result_artifact_data = None
+        # The result is all the artifacts unioned, copied to each result artifact
+        # inside DuckDB so the fragments aren't streamed back through Python
+        await artifact_query.copy_to(self.result_artifacts)
 
         # Record information about the run
         asset_run.materialized = datetime.now(UTC)
@@ -206,6 +277,39 @@ class DataAssetCallable(Generic[P, R]):
 
         return self.result_artifacts[0]
 
+    async def compact(
+        self,
+        target_file_bytes: int | None = None,
+        min_fragments: int = DEFAULT_MIN_FRAGMENTS,
+    ) -> list[PartitionCompaction]:
+        asset = self.asset
+        self._format_asset(asset)
+        artifacts_dir = self._get_artifacts_dir()
+        logger.info(f"Compacting artifacts of asset '{asset.name}' in {artifacts_dir}")
+
+        return await compact_artifacts(
+            artifacts_dir,
+            asset.options,
+            target_file_bytes=target_file_bytes,
+            min_fragments=min_fragments,
+            asset_name=asset.name,
+            asset_id=asset.id,
+        )
+
+    def _format_asset(self, asset: DataAsset):
+        bound_args = self.get_bound_arguments()
+        logger.debug(
+            f"Bound arguments for asset '{asset.name}': {bound_args.arguments}"
+        )
+
+        formatter = AssetTemplateFormatter(self.args, bound_args)
+        asset.name = formatter.format(asset.name) or ""
+        asset.path = formatter.format(asset.path) or ""
+        asset.options.artifacts_dir = (
+            formatter.format(asset.options.artifacts_dir) or ""
+        )
+        logger.debug(f"Formatted asset name: '{asset.name}', path: '{asset.path}'")
+
     def _generate_asset_iteration_guid(self):
         hash_input = f"{self.asset.name}:{self.asset.path}:{self.asset.options.artifacts_dir}:{self.asset_run.runtime.isoformat() if self.asset_run.runtime else ''}:{str(self.args) if self.keywords else ''}"
         guid = hashlib.md5(hash_input.encode()).hexdigest()
@@ -213,22 +317,25 @@ class DataAssetCallable(Generic[P, R]):
         return guid
 
     def get_result_artifact_filetypes(self, asset: DataAsset):
-        path = Path(asset.path)
-        filetypes_part = path.suffix
-
-        return [f if f.startswith(".") else f".{f}" for f in filetypes_part.split("|")]
+        _, suffixes = split_artifact_suffixes(asset.path)
+        return suffixes
 
     def _create_result_artifacts(self, asset: DataAsset) -> list[DataArtifact]:
-        path = Path(asset.path)
+        base_path, suffixes = split_artifact_suffixes(asset.path)
         result_artifacts = []
-        filetypes = self.get_result_artifact_filetypes(asset)
 
-        for filetype in filetypes:
+        for suffix in suffixes:
             result_artifacts.append(
                 DataArtifact(
-                    path.with_suffix(filetype).as_posix(),
+                    f"{base_path}{suffix}",
                     read_json_options=asset.options.read_json_options,
                     read_csv_options=asset.options.read_csv_options,
+                    serialization_executor=asset.options.serialization_executor,
+                    duckdb_settings=asset.options.duckdb_settings,
+                    target_batch_bytes=asset.options.target_batch_bytes,
+                    json_encoder=asset.options.json_encoder,
+                    schema_inference_batches=asset.options.schema_inference_batches,
+                    write_parquet_options=asset.options.write_parquet_options,
                 )
             )
 
@@ -246,19 +353,48 @@ class DataAssetCallable(Generic[P, R]):
             )
             return manifest.last_materialized
 
+        last_materialized = await get_last_successful_materialization(
+            asset.name, asset.id
+        )
+
+        if last_materialized:
+            logger.debug(
+                "Resolved last materialized from run history: %s", last_materialized
+            )
+            return last_materialized
+
         asset_metadata = await get_asset_metadata(asset.name, asset.id)
 
         if not safe_truthy(asset_metadata):
             return
 
-        last_materialized_query = duckdb.query(
-            "SELECT max(CAST(materialized AS VARCHAR)) FROM asset_metadata"
+        last_materialized_query = asset_metadata.query(
+            "asset_metadata",
+            "SELECT max(CAST(materialized AS VARCHAR)) FROM asset_metadata",
         ).fetchone()
 
         if last_materialized_query and last_materialized_query[0]:
             last_materialized = datetime.fromisoformat(str(last_materialized_query[0]))
             return last_materialized.replace(tzinfo=timezone.utc)
 
+    async def _materialized_since(self, asset: DataAsset, runtime: datetime) -> bool:
+        manifest = await load_asset_manifest(asset.name, asset.id)
+
+        if not (
+            manifest
+            and manifest.last_status is ManifestRunStatus.SUCCESS
+            and manifest.last_materialized
+            and manifest.last_materialized >= runtime
+            and await self.result_artifacts[0].exists()
+        ):
+            return False
+
+        self.last_materialized = manifest.last_materialized
+        logger.info(
+            f"Asset '{asset.name}' was materialized by another process at {manifest.last_materialized} while waiting for its lease. Reusing the result."
+        )
+        return True
+
     async def _cached_result(
         self,
         result_artifact: DataArtifact,
@@ -294,13 +430,14 @@ class DataAssetCallable(Generic[P, R]):
                 else ""
             )
 
+        return f"{self._get_artifacts_dir()}/{partition}"
+
+    def _get_artifacts_dir(self):
         # Extract folder path for folder set up
         folder_path = os.path.dirname(self.asset.path)
 
         # Set up the base path for artifact storage
         if not self.asset.options.artifacts_dir:
-            base_path = f"{folder_path}/_artifacts/asset={self.asset.name}/{partition}"
-        else:
-            base_path = f"{self.asset.options.artifacts_dir}/{partition}"
+            return f"{folder_path}/_artifacts/asset={self.asset.name}"
 
-        return base_path
+        return self.asset.options.artifacts_dir
@@ -1,7 +1,16 @@
 from dataclasses import dataclass
 from datetime import timedelta
-from mad_prefect.data_assets import ARTIFACT_FILE_TYPES
-from mad_prefect.data_assets.options import ReadCSVOptions, ReadJsonOptions
+from mad_prefect.data_assets import ARTIFACT_COMPRESSIONS, ARTIFACT_FILE_TYPES
+from mad_prefect.data_assets.options import (
+    ReadCSVOptions,
+    ReadJsonOptions,
+    WriteParquetOptions,
+)
+from mad_prefect.data_assets.serialization import (
+    JSON_ENCODERS,
+    SERIALIZATION_EXECUTORS,
+)
+from mad_prefect.duckdb import DuckDBSettings
 
 
 @dataclass
@@ -12,3 +21,14 @@ class DataAssetOptions:
     read_json_options: ReadJsonOptions | None = None
     read_csv_options: ReadCSVOptions | None = None
     cache_expiration: timedelta | None = None
+    max_in_flight_persists: int = 1
+    serialization_executor: SERIALIZATION_EXECUTORS | None = None
+    duckdb_settings: DuckDBSettings | None = None
+    target_batch_bytes: int | None = None
+    json_encoder: JSON_ENCODERS | None = None
+    schema_inference_batches: int | None = None
+    write_parquet_options: WriteParquetOptions | None = None
+    artifact_compression: ARTIFACT_COMPRESSIONS | None = None
+    fragment_target_rows: int | None = None
+    fragment_target_bytes: int | None = None
+    materialization_lock: bool = True
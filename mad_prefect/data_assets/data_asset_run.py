@@ -7,6 +7,7 @@ from mad_prefect.data_assets.asset_metadata import (
     ManifestRunStatus,
     upsert_asset_manifest_from_run,
 )
+from mad_prefect.data_assets.run_history import append_run_history
 from mad_prefect.filesystems import get_fs
 
 logger = logging.getLogger(__name__)
@@ -43,16 +44,27 @@ class DataAssetRun(BaseModel):
             self,
         )
 
+        manifest_status = status or (
+            ManifestRunStatus.SUCCESS if self.materialized else ManifestRunStatus.UNKNOWN
+        )
+
+        try:
+            await append_run_history(
+                self.model_dump(), status=manifest_status.value, error=error
+            )
+        except Exception:  # pragma: no cover - surfaced via log
+            # metadata.json remains the record of the run, it can be backfilled
+            logger.exception(
+                "Failed to record asset run history",
+                extra={"run_id": self.id, "asset_name": self.asset_name},
+            )
+
         if not update_manifest:
             return
 
         if not (self.asset_name and self.asset_id and self.id):
             return
 
-        manifest_status = status or (
-            ManifestRunStatus.SUCCESS if self.materialized else ManifestRunStatus.UNKNOWN
-        )
-
         await upsert_asset_manifest_from_run(
             asset_name=self.asset_name,
             asset_id=self.asset_id,
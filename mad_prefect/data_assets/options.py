@@ -70,3 +70,23 @@ class ReadCSVOptions(BaseModel):
     types: Optional[Union[List[str], Dict[str, str]]] = None
     dtypes: Optional[Union[List[str], Dict[str, str]]] = None
     column_types: Optional[Union[List[str], Dict[str, str]]] = None
+
+
+class WriteParquetOptions(BaseModel):
+    # Defaulting to None so that pyarrow's and DuckDB's built-in defaults apply.
+    # e.g. "zstd", "snappy", "gzip", "lz4", "brotli" or "uncompressed"
+    compression: Optional[str] = None
+    compression_level: Optional[int] = None
+
+    # Rows per row group, when unset row groups follow target_batch_bytes
+    row_group_size: Optional[int] = None
+    use_dictionary: Optional[bool] = None
+
+    # Bloom filters are written for the listed columns by pyarrow, DuckDB writes
+    # them for every dictionary encoded column
+    bloom_filter_columns: Optional[List[str]] = None
+    bloom_filter_fpp: Optional[float] = None
+
+    # DuckDB always writes statistics, these only apply to pyarrow
+    write_statistics: Optional[bool] = None
+    write_page_index: Optional[bool] = None
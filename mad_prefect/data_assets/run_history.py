@@ -0,0 +1,413 @@
+"""A run-history table of asset runs, partitioned by asset and month.
+
+Every persisted `DataAssetRun` appends a small Parquet file to
+`{RUN_HISTORY_LOCATION}/asset_name=.../month=YYYY-MM/`, so questions about an
+asset's runs list one asset's partitions instead of reading every
+`metadata.json` it ever wrote. Queries for recent runs read the newest months
+first and stop once they have their answer.
+
+A run is recorded each time it's persisted (e.g. when it starts and when it
+finishes), queries keep the latest record of each run. The columns follow
+`DataAssetRun` with the run's `status`, `error` and `recorded_at` appended, all
+timestamps are UTC.
+
+Runs persisted before the table existed are migrated with
+`python -m mad_prefect.data_assets.run_history backfill`. A month of small
+files can be merged with `compact_artifacts`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone
+import io
+import logging
+import posixpath
+from typing import Any, Iterable, Mapping, Sequence
+from uuid import uuid4
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import BaseModel
+
+from mad_prefect.data_assets.asset_decorator import ASSET_METADATA_LOCATION
+from mad_prefect.duckdb import get_connection_pool
+from mad_prefect.filesystems import FsspecFileSystem, get_fs
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "RUN_HISTORY_LOCATION",
+    "append_run_history",
+    "get_run_history",
+    "get_last_runs",
+    "get_duration_percentiles",
+    "get_last_successful_materialization",
+    "backfill_run_history",
+]
+
+RUN_HISTORY_LOCATION = f"{ASSET_METADATA_LOCATION}/run_history"
+
+# The value of ManifestRunStatus.SUCCESS, runs are recorded with the manifest's status
+SUCCESS_STATUS = "success"
+
+_RUN_HISTORY_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("runtime", pa.timestamp("us")),
+        ("materialized", pa.timestamp("us")),
+        ("duration_miliseconds", pa.int64()),
+        ("asset_id", pa.string()),
+        ("asset_name", pa.string()),
+        ("asset_path", pa.string()),
+        ("parameters", pa.string()),
+        ("status", pa.string()),
+        ("error", pa.string()),
+        ("recorded_at", pa.timestamp("us")),
+    ]
+)
+
+_TIMESTAMP_COLUMNS = ("runtime", "materialized", "recorded_at")
+
+# Legacy metadata files read at once while backfilling
+_BACKFILL_READ_CONCURRENCY = 32
+
+
+def _to_utc(value: datetime | str | None) -> datetime | None:
+    """Convert a datetime or ISO string to a naive UTC datetime, naive values are UTC."""
+
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+def _history_row(
+    run: Mapping[str, Any],
+    *,
+    status: str,
+    error: str | None = None,
+    recorded_at: datetime | None = None,
+) -> dict[str, Any]:
+    row = {name: run.get(name) for name in _RUN_HISTORY_SCHEMA.names}
+    row.update(status=status, error=error, recorded_at=recorded_at)
+
+    for column in _TIMESTAMP_COLUMNS:
+        row[column] = _to_utc(row[column])
+
+    return row
+
+
+def _month(row: Mapping[str, Any]) -> str:
+    # Every record of a run shares its runtime, so they land in the same month
+    return (row["runtime"] or row["recorded_at"]).strftime("%Y-%m")
+
+
+def _partition_path(asset_name: str, month: str) -> str:
+    return f"{RUN_HISTORY_LOCATION}/asset_name={asset_name}/month={month}"
+
+
+async def _write_rows(
+    fs: FsspecFileSystem,
+    asset_name: str,
+    month: str,
+    rows: list[dict[str, Any]],
+    prefix: str,
+) -> str:
+    table = pa.Table.from_pylist(rows, schema=_RUN_HISTORY_SCHEMA).sort_by("runtime")
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+
+    path = f"{_partition_path(asset_name, month)}/{prefix}-{uuid4().hex[:12]}.parquet"
+    await fs.write_path(path, buffer.getvalue())
+    return path
+
+
+async def append_run_history(
+    run: Mapping[str, Any],
+    *,
+    status: str,
+    error: str | None = None,
+) -> str | None:
+    """
+    Record a run in the run history, `run` holds the fields of a `DataAssetRun`.
+
+    Returns the path of the file the run was recorded in, or `None` when the run
+    has no asset name or id.
+    """
+
+    if not (run.get("asset_name") and run.get("id")):
+        return None
+
+    fs = await get_fs()
+    recorded_at = datetime.now(timezone.utc)
+    row = _history_row(run, status=status, error=error, recorded_at=recorded_at)
+
+    return await _write_rows(
+        fs,
+        run["asset_name"],
+        _month(row),
+        [row],
+        recorded_at.strftime("%Y%m%dT%H%M%S%f"),
+    )
+
+
+def _history_months(
+    fs: FsspecFileSystem, asset_name: str
+) -> list[tuple[str, list[str]]]:
+    """List an asset's history files by month (`YYYY-MM`), from the newest month."""
+
+    history_glob = f"{RUN_HISTORY_LOCATION}/asset_name={asset_name}/month=*/*.parquet"
+    months: dict[str, list[str]] = defaultdict(list)
+
+    for path in fs.glob(history_glob):
+        partition = posixpath.basename(posixpath.dirname(path))
+        months[partition.removeprefix("month=")].append(path)
+
+    return [(month, sorted(months[month])) for month in sorted(months, reverse=True)]
+
+
+async def _query_history(
+    paths: Sequence[str], asset_id: str | None
+) -> duckdb.DuckDBPyRelation:
+    pool = await get_connection_pool()
+    files = ", ".join(f"'mad://{path}'" for path in paths)
+    asset_filter = ""
+
+    if asset_id is not None:
+        quoted_asset_id = asset_id.replace("'", "''")
+        asset_filter = f"WHERE asset_id = '{quoted_asset_id}'"
+
+    relation = pool.connection.query(
+        f"""
+        SELECT * FROM read_parquet([{files}])
+        {asset_filter}
+        QUALIFY row_number() OVER (
+            PARTITION BY asset_id, id ORDER BY recorded_at DESC
+        ) = 1
+        """
+    )
+    return pool.track(relation)
+
+
+async def get_run_history(
+    asset_name: str,
+    asset_id: str | None = None,
+    *,
+    since: datetime | None = None,
+) -> duckdb.DuckDBPyRelation | None:
+    """
+    Return the latest record of each run of `asset_name`, or `None` without any.
+
+    Runs are limited to one variant when `asset_id` is given. With `since`, only
+    runs from then on are returned and earlier months aren't read.
+    """
+
+    fs = await get_fs()
+    months = _history_months(fs, asset_name)
+
+    if since is not None:
+        since_month = since.astimezone(timezone.utc).strftime("%Y-%m")
+        months = [(month, paths) for month, paths in months if month >= since_month]
+
+    if not months:
+        return None
+
+    relation = await _query_history([p for _, paths in months for p in paths], asset_id)
+
+    if since is not None:
+        relation = relation.filter(f"runtime >= '{_to_utc(since)}'")
+
+    return relation
+
+
+async def get_last_runs(
+    asset_name: str, n: int = 10, asset_id: str | None = None
+) -> duckdb.DuckDBPyRelation | None:
+    """Return the `n` latest runs of `asset_name`, newest first."""
+
+    fs = await get_fs()
+    paths: list[str] = []
+    relation = None
+
+    # Read months from the newest until they hold enough runs
+    for _, month_paths in _history_months(fs, asset_name):
+        paths.extend(month_paths)
+        relation = await _query_history(paths, asset_id)
+        count = relation.aggregate("count(*)").fetchone()
+
+        if count and count[0] >= n:
+            break
+
+    if relation is None:
+        return None
+
+    return relation.order("runtime DESC NULLS LAST, recorded_at DESC").limit(n)
+
+
+async def get_duration_percentiles(
+    asset_name: str,
+    percentiles: Iterable[float] = (0.5, 0.9, 0.99),
+    asset_id: str | None = None,
+    *,
+    since: datetime | None = None,
+) -> dict[float, float]:
+    """
+    Return the run duration in milliseconds at each of `percentiles` (0 to 1) for
+    the successful runs of `asset_name`. Empty when no successful run has a duration.
+    """
+
+    percentiles = list(percentiles)
+    relation = await get_run_history(asset_name, asset_id, since=since)
+
+    if relation is None or not percentiles:
+        return {}
+
+    result = relation.query(
+        "run_history",
+        f"""
+        SELECT quantile_cont(duration_miliseconds, {percentiles})
+        FROM run_history
+        WHERE status = '{SUCCESS_STATUS}' AND duration_miliseconds IS NOT NULL
+        """,
+    ).fetchone()
+
+    if not result or result[0] is None:
+        return {}
+
+    return dict(zip(percentiles, result[0]))
+
+
+async def get_last_successful_materialization(
+    asset_name: str, asset_id: str | None = None
+) -> datetime | None:
+    """Return when `asset_name` was last materialized successfully, in UTC."""
+
+    fs = await get_fs()
+
+    # The newest month with a successful run holds the last one
+    for _, month_paths in _history_months(fs, asset_name):
+        relation = await _query_history(month_paths, asset_id)
+        result = relation.query(
+            "run_history",
+            f"SELECT max(materialized) FROM run_history WHERE status = '{SUCCESS_STATUS}'",
+        ).fetchone()
+
+        if result and result[0]:
+            return result[0].replace(tzinfo=timezone.utc)
+
+    return None
+
+
+async def backfill_run_history(asset_names: Iterable[str] | None = None) -> int:
+    """
+    Record the runs persisted before the run history existed, from each run's
+    `metadata.json`. Runs already in the history are skipped, so backfilling again
+    only adds runs which are still missing. Returns the number of runs recorded.
+    """
+
+    fs = await get_fs()
+    names = list(asset_names) if asset_names is not None else ["*"]
+    metadata_paths = [
+        path
+        for name in names
+        for path in fs.glob(
+            f"{ASSET_METADATA_LOCATION}/asset_name={name}/asset_id=*/asset_run_id=*/metadata.json"
+        )
+    ]
+
+    runs: list[dict[str, Any]] = []
+
+    for start in range(0, len(metadata_paths), _BACKFILL_READ_CONCURRENCY):
+        chunk = metadata_paths[start : start + _BACKFILL_READ_CONCURRENCY]
+        results = await asyncio.gather(
+            *(fs.read_data(path) for path in chunk), return_exceptions=True
+        )
+
+        for path, raw_run in zip(chunk, results):
+            if isinstance(raw_run, BaseException):
+                logger.warning(f"Skipping unreadable run metadata {path}: {raw_run}")
+                continue
+
+            runs.append(
+                raw_run.model_dump() if isinstance(raw_run, BaseModel) else raw_run
+            )
+
+    partitions: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+    recorded: dict[str, set[tuple[str, str]]] = {}
+
+    for run in runs:
+        asset_name = run.get("asset_name")
+
+        if not (asset_name and run.get("id")):
+            continue
+
+        if asset_name not in recorded:
+            recorded[asset_name] = await _recorded_runs(asset_name)
+
+        if (run.get("asset_id"), run["id"]) in recorded[asset_name]:
+            continue
+
+        # The metadata file holds the run's final state, it's recorded as of then
+        row = _history_row(
+            run,
+            status=SUCCESS_STATUS if run.get("materialized") else "unknown",
+            recorded_at=run.get("materialized") or run.get("runtime"),
+        )
+
+        if row["recorded_at"] is None:
+            continue
+
+        recorded[asset_name].add((row["asset_id"], row["id"]))
+        partitions[(asset_name, _month(row))].append(row)
+
+    for (asset_name, month), rows in sorted(partitions.items()):
+        await _write_rows(fs, asset_name, month, rows, "backfill")
+
+    backfilled = sum(len(rows) for rows in partitions.values())
+    logger.info(
+        f"Backfilled {backfilled} runs from {len(metadata_paths)} metadata files into the run history."
+    )
+    return backfilled
+
+
+async def _recorded_runs(asset_name: str) -> set[tuple[str, str]]:
+    relation = await get_run_history(asset_name)
+
+    if relation is None:
+        return set()
+
+    return {
+        (asset_id, run_id)
+        for asset_id, run_id in relation.select("asset_id, id").fetchall()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Maintain the run history of data assets."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser(
+        "backfill", help="Record runs from the legacy metadata.json files."
+    )
+    backfill.add_argument(
+        "--asset-name",
+        action="append",
+        dest="asset_names",
+        help="Only backfill this asset, can be repeated. Defaults to every asset.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = asyncio.run(backfill_run_history(args.asset_names))
+    print(f"Backfilled {count} runs.")
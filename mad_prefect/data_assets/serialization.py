@@ -0,0 +1,326 @@
+"""Batch encoders used by ``DataArtifact`` writers.
+
+The helpers in this module are plain module-level functions so they can be
+dispatched to a thread or process pool, keeping CPU-heavy serialisation off
+the event loop while the asset keeps fetching data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import logging
+import multiprocessing
+import os
+from typing import Any, Callable, Literal, Sequence, TypeVar
+
+import duckdb
+import pyarrow as pa
+from pydantic import TypeAdapter
+
+from mad_prefect.json.mad_json_encoder import MADJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+SERIALIZATION_EXECUTORS = Literal["thread", "process"]
+JSON_ENCODERS = Literal["standard", "orjson"]
+
+_type_adapter: TypeAdapter = TypeAdapter(Any)
+_mad_json_encoder = MADJSONEncoder()
+_executors: dict[str, Executor] = {}
+
+T = TypeVar("T")
+
+
+def _as_sequence(data: object) -> Sequence:
+    return data if isinstance(data, Sequence) else [data]
+
+
+def encode_jsonl(data: object, encoder: JSON_ENCODERS = "standard") -> bytes:
+    """Encode a batch of python objects into JSON Lines bytes."""
+    if encoder == "orjson":
+        return _encode_jsonl_orjson(_as_sequence(data))
+
+    if encoder != "standard":
+        raise ValueError(f"Unsupported JSON encoder: {encoder}")
+
+    lines = [_encode_json_standard(obj) for obj in _as_sequence(data)]
+
+    if not lines:
+        return b""
+
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _encode_json_standard(obj: object) -> str:
+    return json.dumps(_type_adapter.dump_python(obj), cls=MADJSONEncoder)
+
+
+def _import_orjson():
+    try:
+        import orjson
+    except ImportError as e:
+        raise ImportError(
+            "The 'orjson' JSON encoder requires the orjson package. Install it with `pip install orjson`."
+        ) from e
+
+    return orjson
+
+
+def _orjson_default(data: object):
+    # Datetimes are passed through so they keep MADJSONEncoder's format
+    try:
+        return _mad_json_encoder.default(data)
+    except TypeError:
+        # Pydantic models and other types the TypeAdapter knows how to dump
+        dumped = _type_adapter.dump_python(data)
+
+        if dumped is data:
+            raise
+
+        return dumped
+
+
+def _encode_jsonl_orjson(records: Sequence) -> bytes:
+    orjson = _import_orjson()
+    option = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_APPEND_NEWLINE
+    )
+    lines: list[bytes] = []
+
+    for obj in records:
+        try:
+            lines.append(orjson.dumps(obj, default=_orjson_default, option=option))
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which the standard encoder supports
+            lines.append((_encode_json_standard(obj) + "\n").encode())
+
+    return b"".join(lines)
+
+
+def _json_column(field: pa.Field) -> str:
+    name = '"' + field.name.replace('"', '""') + '"'
+
+    # Match MADJSONEncoder, which always writes timestamps with microseconds
+    if pa.types.is_timestamp(field.type) and field.type.tz is None:
+        return f"strftime({name}, '%Y-%m-%d %H:%M:%S.%f') AS {name}"
+
+    return name
+
+
+def encode_arrow_jsonl(
+    connection: duckdb.DuckDBPyConnection, data: pa.RecordBatch | pa.Table
+) -> list[pa.Buffer]:
+    """
+    Encode an Arrow batch into JSON Lines inside DuckDB.
+
+    Every row is encoded by DuckDB's `to_json`, and the lines are returned as
+    slices of the result's string buffers, so no python objects are created for
+    the rows.
+    """
+    columns = ", ".join(_json_column(field) for field in data.schema)
+    arrow_batch = data
+    lines = connection.execute(
+        f"SELECT to_json(t) || chr(10) FROM (SELECT {columns} FROM arrow_batch) t"
+    ).fetch_arrow_table()
+    buffers: list[pa.Buffer] = []
+
+    for chunk in lines.column(0).chunks:
+        if not (pa.types.is_string(chunk.type) or pa.types.is_large_string(chunk.type)):
+            chunk = chunk.cast(pa.large_string())
+
+        if not len(chunk):
+            continue
+
+        # The lines never contain nulls, so the values between the first and last
+        # offsets are the newline separated JSON documents
+        _, offsets_buffer, data_buffer = chunk.buffers()
+        offset_type = pa.int64() if pa.types.is_large_string(chunk.type) else pa.int32()
+        offsets = pa.Array.from_buffers(
+            offset_type, len(chunk) + 1, [None, offsets_buffer], offset=chunk.offset
+        )
+        start, end = offsets[0].as_py(), offsets[-1].as_py()
+        buffers.append(data_buffer.slice(start, end - start))
+
+    return buffers
+
+
+def _has_empty_struct(data_type: pa.DataType) -> bool:
+    if pa.types.is_struct(data_type):
+        return data_type.num_fields == 0 or any(
+            _has_empty_struct(data_type.field(i).type)
+            for i in range(data_type.num_fields)
+        )
+
+    if pa.types.is_list(data_type) or pa.types.is_large_list(data_type):
+        return _has_empty_struct(data_type.value_type)
+
+    return False
+
+
+def _null_empty_structs(array: pa.Array) -> pa.Array:
+    """Replace empty structs, which Parquet can't store, with nulls."""
+    data_type = array.type
+
+    if not _has_empty_struct(data_type):
+        return array
+
+    mask = array.is_null() if array.null_count else None
+
+    if pa.types.is_struct(data_type):
+        if data_type.num_fields == 0:
+            return pa.nulls(len(array))
+
+        children = [_null_empty_structs(child) for child in array.flatten()]
+        fields = [
+            pa.field(field.name, child.type, field.nullable, field.metadata)
+            for field, child in zip(data_type, children)
+        ]
+        return pa.StructArray.from_arrays(children, fields=fields, mask=mask)
+
+    list_type = pa.LargeListArray if pa.types.is_large_list(data_type) else pa.ListArray
+    values = _null_empty_structs(array.values)
+
+    return list_type.from_arrays(array.offsets, values, mask=mask)
+
+
+def _from_pylist(data: object, factory: Callable[[Any], T]) -> T:
+    # Arrow converts JSON-native records (and datetimes, decimals, bytes) in a single
+    # pass, and refuses anything it doesn't recognise. Only those batches, e.g. ones
+    # holding pydantic models or dataclasses, are dumped through the TypeAdapter first
+    try:
+        return factory(data)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, AttributeError):
+        return factory(_type_adapter.dump_python(data))
+
+
+def to_record_batch(data: object) -> pa.RecordBatch:
+    """Convert a batch of python objects into a Parquet-safe ``pa.RecordBatch``."""
+    batch = _from_pylist(data, pa.RecordBatch.from_pylist)
+
+    if not any(_has_empty_struct(field.type) for field in batch.schema):
+        return batch
+
+    columns = [_null_empty_structs(column) for column in batch.columns]
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def to_table(data: object) -> pa.Table:
+    """Convert a batch of python objects into a ``pa.Table``."""
+    return _from_pylist(data, pa.Table.from_pylist)
+
+
+def unify_schema(schemas: Sequence[pa.Schema]) -> pa.Schema:
+    """Unify `schemas` into one which every batch can be cast to."""
+    try:
+        return pa.unify_schemas(list(schemas), promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"Cannot unify the schemas of the batches: {e}") from e
+
+
+def align_to_schema(
+    data: pa.RecordBatch | pa.Table, schema: pa.Schema
+) -> pa.RecordBatch | pa.Table:
+    """
+    Align `data` with `schema`, reordering columns, adding missing columns as nulls
+    and casting the rest. Data already matching the schema is returned as is.
+    """
+    if data.schema.equals(schema):
+        return data
+
+    extra_columns = set(data.schema.names) - set(schema.names)
+
+    if extra_columns:
+        raise ValueError(
+            f"Batch has columns which aren't in the file's schema: {sorted(extra_columns)}"
+        )
+
+    columns = []
+
+    for field in schema:
+        if field.name not in data.schema.names:
+            columns.append(pa.nulls(len(data), field.type))
+            continue
+
+        column = data.column(field.name)
+
+        if not column.type.equals(field.type):
+            try:
+                column = column.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(
+                    f"Cannot cast column '{field.name}' from {column.type} to {field.type}: {e}"
+                ) from e
+
+        columns.append(column)
+
+    if isinstance(data, pa.Table):
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _get_max_workers() -> int | None:
+    max_workers = os.getenv("SERIALIZATION_MAX_WORKERS")
+
+    if not max_workers:
+        return None
+
+    try:
+        value = int(max_workers)
+    except ValueError:
+        value = 0
+
+    if value < 1:
+        raise ValueError(
+            f"SERIALIZATION_MAX_WORKERS must be a positive integer, got '{max_workers}'"
+        )
+
+    return value
+
+
+def get_serialization_executor(kind: SERIALIZATION_EXECUTORS) -> Executor:
+    """Return the shared executor for ``kind``, creating it on first use."""
+    executor = _executors.get(kind)
+
+    if executor is not None:
+        return executor
+
+    max_workers = _get_max_workers()
+
+    if kind == "thread":
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="mad-serialization",
+        )
+    elif kind == "process":
+        # Spawn workers instead of forking, DuckDB and Prefect hold threads and locks
+        # which are not safe to copy into a forked child process
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    else:
+        raise ValueError(f"Unsupported serialization executor: {kind}")
+
+    logger.debug(f"Created '{kind}' serialization executor.")
+    _executors[kind] = executor
+    return executor
+
+
+async def run_serializer(
+    executor_kind: SERIALIZATION_EXECUTORS | None,
+    fn: Callable[[Any], T],
+    data: object,
+) -> T:
+    """Run ``fn(data)`` inline, or on the configured executor when one is set."""
+    if executor_kind is None:
+        return fn(data)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_serialization_executor(executor_kind), fn, data
+    )
@@ -1,5 +1,14 @@
+import asyncio
 from inspect import isasyncgen, iscoroutine, isgenerator
-from typing import Optional, TypeGuard, TypeVar
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    TypeGuard,
+    TypeVar,
+)
 import pandas as pd
 
 
@@ -19,6 +28,66 @@ async def yield_data_batches(data: object):
 
 
 T = TypeVar("T")
+R = TypeVar("R")
+
+_FAN_OUT_DONE = object()
+
+
+async def fan_out(
+    batches: Iterable[T],
+    consumers: list[Callable[[AsyncIterator[T]], Awaitable[R]]],
+    max_buffered: int = 2,
+) -> list[R]:
+    """
+    Read `batches` once and feed every batch to all `consumers` concurrently.
+
+    Each consumer receives its own async iterator over the batches. Every branch
+    buffers at most `max_buffered` batches, so the slowest consumer sets the pace
+    and memory stays bounded. If a consumer fails, the others are cancelled.
+    """
+    queues: list[asyncio.Queue] = [
+        asyncio.Queue(maxsize=max_buffered) for _ in consumers
+    ]
+    finished: set[int] = set()
+
+    async def produce():
+        for batch in batches:
+            for i, queue in enumerate(queues):
+                if i not in finished:
+                    await queue.put(batch)
+
+        for i, queue in enumerate(queues):
+            if i not in finished:
+                await queue.put(_FAN_OUT_DONE)
+
+    async def branch(queue: asyncio.Queue) -> AsyncIterator[T]:
+        while (batch := await queue.get()) is not _FAN_OUT_DONE:
+            yield batch
+
+    def on_consumer_done(i: int):
+        # A consumer which stops early mustn't leave the producer waiting on its queue
+        finished.add(i)
+
+        while not queues[i].empty():
+            queues[i].get_nowait()
+
+    producer = asyncio.create_task(produce())
+    tasks: list[asyncio.Future[R]] = []
+
+    for i, (consumer, queue) in enumerate(zip(consumers, queues)):
+        task = asyncio.ensure_future(consumer(branch(queue)))
+        task.add_done_callback(lambda _, i=i: on_consumer_done(i))
+        tasks.append(task)
+
+    try:
+        await asyncio.gather(producer, *tasks)
+    finally:
+        for task in [producer, *tasks]:
+            task.cancel()
+
+        await asyncio.gather(producer, *tasks, return_exceptions=True)
+
+    return [task.result() for task in tasks]
 
 
 def safe_truthy(data: Optional[T]) -> TypeGuard[T]:
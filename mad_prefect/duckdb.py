@@ -1,6 +1,10 @@
-from typing import cast
+import asyncio
+from contextlib import contextmanager
+import os
+from typing import Iterator, cast
 import duckdb
 import fsspec
+from pydantic import BaseModel
 from mad_prefect.filesystems import get_fs
 from fsspec.implementations.dirfs import DirFileSystem
 import weakref
@@ -77,3 +81,217 @@ async def register_mad_protocol(connection: duckdb.DuckDBPyConnection | None = N
         register_fsspec_filesystem(mad_fs, connection)
     else:
         register_fsspec_filesystem(mad_fs)
+
+
+class DuckDBSettings(BaseModel):
+    """Per-connection DuckDB configuration, unset values fall back to DuckDB's defaults."""
+
+    threads: int | None = None
+    memory_limit: str | None = None
+    temp_directory: str | None = None
+    preserve_insertion_order: bool | None = None
+
+    @classmethod
+    def from_env(cls) -> "DuckDBSettings":
+        preserve_insertion_order = os.getenv("DUCKDB_PRESERVE_INSERTION_ORDER")
+        threads = os.getenv("DUCKDB_THREADS")
+
+        return cls(
+            threads=int(threads) if threads else None,
+            memory_limit=os.getenv("DUCKDB_MEMORY_LIMIT") or None,
+            temp_directory=os.getenv("DUCKDB_TEMP_DIRECTORY") or None,
+            preserve_insertion_order=(
+                preserve_insertion_order.lower() in ("1", "true", "yes")
+                if preserve_insertion_order
+                else None
+            ),
+        )
+
+    def to_config(self) -> dict[str, str | int | bool]:
+        return self.model_dump(exclude_none=True)
+
+    def apply(self, connection: duckdb.DuckDBPyConnection):
+        """Apply the settings to an existing connection's database."""
+        for name, value in self.to_config().items():
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            elif isinstance(value, str):
+                value = "'" + value.replace("'", "''") + "'"
+
+            connection.execute(f"SET {name} = {value}")
+
+    def merge(self, overrides: "DuckDBSettings | None") -> "DuckDBSettings":
+        """Return a copy with any values set on `overrides` taking precedence."""
+        if not overrides:
+            return self
+
+        return self.model_copy(update=overrides.model_dump(exclude_none=True))
+
+
+class DuckDBConnectionPool:
+    """
+    A configured DuckDB database which hands out cursors.
+
+    Relations returned to callers are created on the pool's `connection`, which lives
+    as long as the pool. The default pool wraps DuckDB's default connection, so its
+    relations can be mixed with `duckdb.query` and replacement scans in asset code just
+    like before. Pools created for explicit settings own a separate database, their
+    relations must be queried through `get_relation_connection(relation)`.
+
+    Short-lived internal work (streaming a DataFrame into Arrow batches) runs on
+    cursors checked out with `acquire`/`cursor`. A cursor is only returned to the pool
+    once everything it produced has been consumed, so a query on a reused cursor can't
+    cut short a result that is still being read.
+    """
+
+    def __init__(
+        self,
+        settings: DuckDBSettings,
+        mad_filesystem: MadFileSystem,
+        filesystem: fsspec.AbstractFileSystem,
+        connection: duckdb.DuckDBPyConnection | None = None,
+    ):
+        self.settings = settings
+        self.mad_filesystem = mad_filesystem
+        self.filesystem = filesystem
+        self._owns_connection = connection is None
+
+        if connection is None:
+            connection = duckdb.connect(config=settings.to_config())
+        else:
+            settings.apply(connection)
+
+        self.connection = connection
+        self._idle_cursors: list[duckdb.DuckDBPyConnection] = []
+
+    async def _register_filesystems(self):
+        if self._owns_connection:
+            await register_mad_protocol(self.connection)
+            register_fsspec_filesystem(self.filesystem, self.connection)
+        else:
+            # The default connection uses the process wide registrations
+            await register_mad_protocol()
+            register_fsspec_filesystem(self.filesystem)
+
+    def track(self, relation: duckdb.DuckDBPyRelation) -> duckdb.DuckDBPyRelation:
+        """Record that `relation` was created on the pool's connection."""
+        _relation_connections[relation] = self.connection
+        return relation
+
+    def acquire(self) -> duckdb.DuckDBPyConnection:
+        """Check out an idle cursor, or open a new one if none are available."""
+        try:
+            return self._idle_cursors.pop()
+        except IndexError:
+            return self.connection.cursor()
+
+    def release(self, cursor: duckdb.DuckDBPyConnection):
+        """Return a cursor once nothing it produced is still in use."""
+        self._idle_cursors.append(cursor)
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Check out a cursor for the duration of the block."""
+        cursor = self.acquire()
+
+        try:
+            yield cursor
+        finally:
+            self.release(cursor)
+
+    def close_idle_cursors(self):
+        """Close the cursors which aren't checked out."""
+        while self._idle_cursors:
+            self._idle_cursors.pop().close()
+
+    def close(self):
+        """
+        Close the idle cursors, and the database if the pool created it.
+
+        Relations created on the pool's connection can't be used afterwards.
+        """
+        self.close_idle_cursors()
+
+        if self._owns_connection:
+            self.connection.close()
+
+
+_relation_connections: "weakref.WeakKeyDictionary[duckdb.DuckDBPyRelation, duckdb.DuckDBPyConnection]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _default_connection() -> duckdb.DuckDBPyConnection:
+    # `default_connection` became a function in DuckDB 1.1
+    connection = duckdb.default_connection
+    return connection() if callable(connection) else connection
+
+
+def get_relation_connection(
+    relation: duckdb.DuckDBPyRelation,
+) -> duckdb.DuckDBPyConnection:
+    """
+    Return the connection which can query `relation`.
+
+    Relations tracked by a pool belong to that pool's connection, everything else
+    (e.g. relations from `duckdb.query`) belongs to DuckDB's default connection.
+    """
+    connection = _relation_connections.get(relation)
+    return connection if connection is not None else _default_connection()
+
+
+_DEFAULT_POOL_KEY = "default"
+_connection_pools: dict[str, DuckDBConnectionPool] = {}
+_connection_pool_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def get_connection_pool(
+    settings: DuckDBSettings | None = None,
+) -> DuckDBConnectionPool:
+    """
+    Return the connection pool for `settings`, creating it on first use.
+
+    Without `settings` this is the default pool, which wraps DuckDB's default
+    connection and applies any `DUCKDB_*` environment variables to it. Explicit
+    settings get a pool with its own database, values which aren't set on them fall
+    back to the environment variables so an asset only needs to override the
+    settings it cares about.
+    """
+
+    if settings is None:
+        key = _DEFAULT_POOL_KEY
+        settings = DuckDBSettings.from_env()
+    else:
+        settings = DuckDBSettings.from_env().merge(settings)
+        key = settings.model_dump_json()
+
+    # Concurrent first calls must not each build (and register) their own pool
+    loop = asyncio.get_running_loop()
+    lock = _connection_pool_locks.setdefault(loop, asyncio.Lock())
+
+    async with lock:
+        mad_fs = await _get_mad_filesystem()
+        pool = _connection_pools.get(key)
+
+        if pool is not None and pool.mad_filesystem is mad_fs:
+            return pool
+
+        # Pools are bound to the filesystem they were created with. A replaced pool's
+        # idle cursors are closed straight away, its database lives on until the
+        # relations created on it have been garbage collected
+        if pool is not None:
+            pool.close_idle_cursors()
+
+        fs = await get_fs()
+        pool = DuckDBConnectionPool(
+            settings,
+            mad_fs,
+            fs._fs,
+            connection=_default_connection() if key == _DEFAULT_POOL_KEY else None,
+        )
+        await pool._register_filesystems()
+        _connection_pools[key] = pool
+
+    return pool
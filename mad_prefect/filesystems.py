@@ -1,13 +1,16 @@
+import asyncio
 import io
 from io import StringIO
 import os
-from typing import Any, cast
+from typing import Any, Literal, cast
 from pandas import DataFrame, read_parquet, read_csv
 import prefect.filesystems
 import prefect.utilities.asyncutils
 import fsspec
+import fsspec.asyn
 import fsspec.utils
 from prefect.serializers import JSONSerializer
+from prefect.utilities.asyncutils import run_sync_in_worker_thread
 from prefect.blocks.fields import SecretDict
 from pydantic import model_validator
 import sshfs
@@ -20,6 +23,24 @@ fsspec.register_implementation("sftp", sshfs.SSHFileSystem)
 FILESYSTEM_URL = os.getenv("FILESYSTEM_URL", "file://./.tmp/storage")
 FILESYSTEM_BLOCK_NAME = os.getenv("FILESYSTEM_BLOCK_NAME")
 
+# Protocols which must upload through a local temporary file rather than writing directly
+FILESYSTEM_TEMPFILE_PROTOCOLS = {
+    protocol.strip()
+    for protocol in os.getenv("FILESYSTEM_TEMPFILE_PROTOCOLS", "").split(",")
+    if protocol.strip()
+}
+
+# Payloads larger than this are streamed to the backend in chunks (multipart uploads on object stores)
+FILESYSTEM_STREAMING_WRITE_THRESHOLD = int(
+    os.getenv("FILESYSTEM_STREAMING_WRITE_THRESHOLD", str(32 * 1024 * 1024))
+)
+FILESYSTEM_STREAMING_WRITE_CHUNK_SIZE = int(
+    os.getenv("FILESYSTEM_STREAMING_WRITE_CHUNK_SIZE", str(8 * 1024 * 1024))
+)
+
+WRITE_STRATEGIES = Literal["pipe", "tempfile"]
+_write_strategies: dict[str, WRITE_STRATEGIES] = {}
+
 
 class FsspecFileSystem(
     prefect.filesystems.WritableFileSystem,
@@ -68,74 +89,189 @@ class FsspecFileSystem(
             for abs_path in abs_paths
         ]
 
+    async def list_files(self, path: str) -> dict[str, int]:
+        """List the files below `path` recursively, with their size in bytes."""
+        resolved_path = self._resolve_path(path)
+
+        if not await self._call_fs("exists", resolved_path):
+            return {}
+
+        infos = cast(
+            dict[str, dict], await self._call_fs("find", resolved_path, detail=True)
+        )
+        fs_url = self._fs_url.rstrip("/")
+
+        # return relative paths to the basepath
+        return {
+            abs_path.replace(f"{fs_url}/", ""): int(info.get("size") or 0)
+            for abs_path, info in infos.items()
+            if info.get("type") == "file"
+        }
+
     def mkdirs(self, path: str, exist_ok: bool = False):
         self._fs.mkdirs(self._resolve_path(path), exist_ok=exist_ok)
 
     def exists(self, path: str):
         return self._fs.exists(self._resolve_path(path))
 
+    async def _call_fs(self, method: str, *args, **kwargs) -> Any:
+        """
+        Call a filesystem method without blocking the event loop.
+
+        Backends built on fsspec's AsyncFileSystem (s3fs, gcsfs, adlfs, sshfs) expose
+        coroutine counterparts of their methods (e.g. `_cat_file` for `cat_file`),
+        these are scheduled on the filesystem's own event loop. All other backends
+        are called in a worker thread.
+        """
+        fs = self._fs
+        coroutine_fn = (
+            getattr(fs, f"_{method}", None)
+            if getattr(fs, "async_impl", False)
+            else None
+        )
+
+        if coroutine_fn is not None:
+            coroutine = coroutine_fn(*args, **kwargs)
+
+            if getattr(fs, "asynchronous", False):
+                return await coroutine
+
+            # The filesystem is bound to fsspec's IO loop running in another thread
+            return await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(coroutine, fs.loop)
+            )
+
+        return await run_sync_in_worker_thread(getattr(fs, method), *args, **kwargs)
+
+    async def info(self, path: str) -> dict | None:
+        """Get the details (size, mtime, ETag, ...) of a path, None if it's missing."""
+        try:
+            return cast(dict, await self._call_fs("info", self._resolve_path(path)))
+        except FileNotFoundError:
+            return None
+
     async def read_path(self, path: str) -> bytes:
         path = self._resolve_path(path)
 
-        # Check if the path exists
-        if not self._fs.exists(path):
+        # Check if the path exists, a single info call also tells us the type
+        try:
+            info = await self._call_fs("info", path)
+        except FileNotFoundError:
             raise ValueError(f"Path {path} does not exist.")
 
         # Validate that its a file
-        if self._fs.info(path)["type"] != "file":
+        if info["type"] != "file":
             raise ValueError(f"Path {path} is not a file.")
 
-        self._fs.mkdirs(self._fs._parent(path), exist_ok=True)
-        file = self._fs.read_bytes(path)
+        file = await self._call_fs("cat_file", path)
 
         return cast(bytes, file)
 
+    @property
+    def _protocol(self) -> str:
+        protocol = self._fs.protocol
+        return protocol if isinstance(protocol, str) else protocol[0]
+
+    def _write_strategy(self) -> WRITE_STRATEGIES:
+        """
+        Determine how payloads are uploaded for this filesystem's protocol.
+
+        Payloads are written directly (`pipe_file`, or a streaming writer for large
+        payloads) unless the protocol is listed in `FILESYSTEM_TEMPFILE_PROTOCOLS`
+        or the async backend doesn't implement `_pipe_file`, in which case the
+        payload is uploaded from a local temporary file.
+        """
+        protocol = self._protocol
+        strategy = _write_strategies.get(protocol)
+
+        if strategy:
+            return strategy
+
+        if protocol in FILESYSTEM_TEMPFILE_PROTOCOLS:
+            strategy = "tempfile"
+        elif getattr(self._fs, "async_impl", False) and (
+            type(self._fs)._pipe_file is fsspec.asyn.AsyncFileSystem._pipe_file
+        ):
+            strategy = "tempfile"
+        else:
+            strategy = "pipe"
+
+        _write_strategies[protocol] = strategy
+        return strategy
+
     async def write_path(self, path: str, content: bytes):
         resolved_path = self._resolve_path(path)
 
         # Ensure the directory is created
-        self._fs.mkdirs(self._fs._parent(resolved_path), exist_ok=True)
+        await self._call_fs(
+            "makedirs", self._fs._parent(resolved_path), exist_ok=True
+        )
 
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(content)
-            temp_file.flush()
+        if self._write_strategy() == "pipe":
+            if len(content) > FILESYSTEM_STREAMING_WRITE_THRESHOLD:
+                await run_sync_in_worker_thread(
+                    self._stream_write, resolved_path, content
+                )
+            else:
+                await self._call_fs("pipe_file", resolved_path, content)
 
-            # Remember the temporary file name to delete it later
-            temp_path = temp_file.name
+            return path
+
+        # Create a temporary file off the event loop
+        temp_path = await run_sync_in_worker_thread(self._write_temp_file, content)
 
         # Upload the temporary file to the destination path
         try:
-            self._fs.put(temp_path, resolved_path)
+            await self._call_fs("put", temp_path, resolved_path)
         finally:
             # Ensure the temporary file is deleted
             os.remove(temp_path)
 
         return path
 
+    def _stream_write(self, resolved_path: str, content: bytes):
+        # Object stores upload each block of a streaming writer as a multipart part
+        view = memoryview(content)
+        chunk_size = FILESYSTEM_STREAMING_WRITE_CHUNK_SIZE
+
+        with self._fs.open(resolved_path, "wb", block_size=chunk_size) as file:
+            for offset in range(0, len(view), chunk_size):
+                file.write(view[offset : offset + chunk_size])
+
+    @staticmethod
+    def _write_temp_file(content: bytes) -> str:
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+
+            # Remember the temporary file name to delete it later
+            return temp_file.name
+
     async def move_path(self, path: str, dest: str) -> str:
         source_path = self._resolve_path(path)
         destination_path = self._resolve_path(dest)
 
         # Ensure source path exists
-        if not self._fs.exists(source_path):
+        if not await self._call_fs("exists", source_path):
             raise ValueError(f"Source path {source_path} does not exist.")
 
         # Ensure destination's parent directory exists
-        self._fs.mkdirs(self._fs._parent(destination_path), exist_ok=True)
+        await self._call_fs(
+            "makedirs", self._fs._parent(destination_path), exist_ok=True
+        )
 
         # Move the file
-        self._fs.move(source_path, destination_path)
+        await self._call_fs("mv", source_path, destination_path)
 
         return destination_path
 
     async def delete_path(self, path: str, recursive: bool = False) -> None:
         resolved_path = self._resolve_path(path)
 
-        if not self.exists(path):
+        if not await self._call_fs("exists", resolved_path):
             return
 
-        self._fs.rm(resolved_path, recursive=recursive)
+        await self._call_fs("rm", resolved_path, recursive=recursive)
 
     async def get_directory(
         self, from_path: str | None = None, local_path: str | None = None
@@ -211,21 +347,41 @@ class FsspecFileSystem(
 
         return data
 
-    async def open(self, path: str, mode: str = "rb", auto_mkdir: bool = False):
+    async def open(
+        self,
+        path: str,
+        mode: str = "rb",
+        auto_mkdir: bool = False,
+        compression: str | None = None,
+    ):
         resolved_path = self._resolve_path(path)
 
         if "w" in mode:
             if auto_mkdir:
-                self._fs.mkdirs(self._fs._parent(resolved_path), exist_ok=True)
+                await self._call_fs(
+                    "makedirs", self._fs._parent(resolved_path), exist_ok=True
+                )
         else:
             # Check if the path exists and is a file
-            if not self._fs.exists(resolved_path):
+            try:
+                info = await self._call_fs("info", resolved_path)
+            except FileNotFoundError:
                 raise ValueError(f"Path {resolved_path} does not exist.")
-            if self._fs.info(resolved_path)["type"] != "file":
+            if info["type"] != "file":
                 raise ValueError(f"Path {resolved_path} is not a file.")
 
-        # Open the file and read the contents
-        return self._fs.open(resolved_path, mode=mode)
+        if compression:
+            # Unlike fs.open, OpenFile closes the underlying file along with the
+            # (de)compressing stream wrapped around it
+            open_file = fsspec.core.OpenFile(
+                self._fs, resolved_path, mode=mode, compression=compression
+            )
+            return await run_sync_in_worker_thread(open_file.open)
+
+        # Open the file, backends may connect or stat the path when opening
+        return await run_sync_in_worker_thread(
+            self._fs.open, resolved_path, mode=mode
+        )
 
 
 _get_fs_result: FsspecFileSystem | None = None
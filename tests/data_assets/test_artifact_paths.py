@@ -0,0 +1,60 @@
+import pytest
+from mad_prefect.data_assets.artifact_paths import (
+    artifact_suffix,
+    parse_artifact_suffix,
+    split_artifact_suffixes,
+)
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("data/customers.json", ("json", None)),
+        ("data/customers.parquet", ("parquet", None)),
+        ("data/customers.arrow", ("arrow", None)),
+        ("data/customers.feather", ("arrow", None)),
+        ("data/customers.json.gz", ("json", "gzip")),
+        ("data/customers.jsonl.zst", ("json", "zstd")),
+        ("data/v1.2/customers.CSV.GZ", ("csv", "gzip")),
+    ],
+)
+def test_parse_artifact_suffix(path, expected):
+    assert parse_artifact_suffix(path) == expected
+
+
+@pytest.mark.parametrize(
+    "path, error",
+    [
+        ("data/customers.txt", "Unsupported file type"),
+        ("data/customers.gz", "Unsupported file type"),
+        ("data/customers.parquet.gz", "Unsupported compression"),
+    ],
+)
+def test_parse_artifact_suffix_rejects_unsupported_paths(path, error):
+    with pytest.raises(ValueError, match=error):
+        parse_artifact_suffix(path)
+
+
+def test_artifact_suffix():
+    assert artifact_suffix("json") == ".json"
+    assert artifact_suffix("json", "zstd") == ".json.zst"
+    assert artifact_suffix("csv", "gzip") == ".csv.gz"
+
+    with pytest.raises(ValueError, match="write_parquet_options"):
+        artifact_suffix("parquet", "gzip")
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("data/customers.json", ("data/customers", [".json"])),
+        ("data/customers.parquet|csv", ("data/customers", [".parquet", ".csv"])),
+        (
+            "data/customers.json.gz|parquet|csv.gz",
+            ("data/customers", [".json.gz", ".parquet", ".csv.gz"]),
+        ),
+        ("data/v1.2/customers.jsonl.zst", ("data/v1.2/customers", [".jsonl.zst"])),
+    ],
+)
+def test_split_artifact_suffixes(path, expected):
+    assert split_artifact_suffixes(path) == expected
@@ -9,10 +9,22 @@ from mad_prefect.data_assets.asset_metadata import (
     AssetManifest,
     AssetManifestRun,
     ManifestRunStatus,
+    clear_manifest_cache,
     get_asset_metadata,
     load_asset_manifest,
+    load_asset_manifests,
+    persist_asset_manifest,
+    rebuild_manifest_index,
 )
 from mad_prefect.data_assets import ASSET_METADATA_LOCATION
+from mad_prefect.data_assets.run_history import (
+    RUN_HISTORY_LOCATION,
+    backfill_run_history,
+    get_duration_percentiles,
+    get_last_runs,
+    get_last_successful_materialization,
+    get_run_history,
+)
 from mad_prefect.data_assets.data_asset_run import DataAssetRun
 from mad_prefect.data_assets.data_asset_callable import DataAssetCallable
 from mad_prefect.data_assets.data_asset import DataAsset
@@ -302,3 +314,210 @@ def _create_test_callable(asset_name: str) -> DataAssetCallable:
     )
 
     return DataAssetCallable(asset_instance)
+
+
+async def test_manifest_cache_skips_reads_until_the_file_changes(
+    isolated_filesystem, monkeypatch
+):
+    fs = await mad_filesystems.get_fs()
+    reads = []
+    read_data = fs.read_data
+
+    async def counting_read_data(path, *args, **kwargs):
+        reads.append(path)
+        return await read_data(path, *args, **kwargs)
+
+    monkeypatch.setattr(fs, "read_data", counting_read_data)
+    clear_manifest_cache()
+
+    manifest = AssetManifest(asset_name="asset.name", asset_id="asset-id")
+    await persist_asset_manifest(manifest)
+
+    # Written manifests are cached, loading them only checks the file's version
+    for _ in range(3):
+        loaded = await load_asset_manifest("asset.name", "asset-id")
+        assert loaded == manifest
+    assert reads == []
+
+    # Another process rewrites the manifest
+    path = (
+        f"{ASSET_METADATA_LOCATION}/asset_name=asset.name/asset_id=asset-id/manifest.json"
+    )
+    changed = manifest.model_copy(update={"last_error": "failed elsewhere"})
+    await fs.write_data(path, changed.model_dump(mode="json"))
+
+    loaded = await load_asset_manifest("asset.name", "asset-id")
+    assert loaded and loaded.last_error == "failed elsewhere"
+    assert len(reads) == 1
+
+    assert await load_asset_manifest("asset.name", "asset-id") == loaded
+    assert len(reads) == 1
+
+    await fs.delete_path(path)
+    assert await load_asset_manifest("asset.name", "asset-id") is None
+
+
+async def test_load_asset_manifests_reads_the_index(isolated_filesystem, monkeypatch):
+    fs = await mad_filesystems.get_fs()
+
+    for name, asset_id in [("orders", "a"), ("orders", "b"), ("customers", "c")]:
+        await persist_asset_manifest(AssetManifest(asset_name=name, asset_id=asset_id))
+
+    reads = []
+    read_path = fs.read_path
+
+    async def counting_read_path(path):
+        reads.append(path)
+        return await read_path(path)
+
+    monkeypatch.setattr(fs, "read_path", counting_read_path)
+    clear_manifest_cache()
+
+    manifests = await load_asset_manifests(["orders", "products"])
+    assert [(m.asset_name, m.asset_id) for m in manifests] == [
+        ("orders", "a"),
+        ("orders", "b"),
+    ]
+    assert len(await load_asset_manifests()) == 3
+
+    # One read of the index, the second load is served from the cache
+    assert reads == [f"{ASSET_METADATA_LOCATION}/manifest_index.parquet"]
+
+
+async def test_manifest_index_keeps_the_latest_manifest(isolated_filesystem):
+    manifest = AssetManifest(asset_name="orders", asset_id="a")
+    await persist_asset_manifest(manifest)
+
+    updated = manifest.with_run(
+        AssetManifestRun(
+            id="run-1",
+            metadata_path="metadata.json",
+            materialized=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        )
+    )
+    await persist_asset_manifest(updated)
+
+    # An older manifest persisted late doesn't replace the newer one in the index
+    await persist_asset_manifest(manifest)
+
+    clear_manifest_cache()
+    [indexed] = await load_asset_manifests(["orders"])
+    assert indexed.last_run and indexed.last_run.id == "run-1"
+
+
+async def test_rebuild_manifest_index(isolated_filesystem):
+    fs = await mad_filesystems.get_fs()
+
+    for asset_id in ["a", "b"]:
+        manifest = AssetManifest(asset_name="orders", asset_id=asset_id)
+        await persist_asset_manifest(manifest)
+
+    await fs.delete_path(f"{ASSET_METADATA_LOCATION}/manifest_index.parquet")
+    clear_manifest_cache()
+    assert await load_asset_manifests() == []
+
+    assert await rebuild_manifest_index() == 2
+    assert [m.asset_id for m in await load_asset_manifests(["orders"])] == ["a", "b"]
+
+
+def _run(run_id: str, day: datetime, duration: int | None = None) -> DataAssetRun:
+    return DataAssetRun(
+        id=run_id,
+        runtime=day,
+        materialized=day if duration is not None else None,
+        duration_miliseconds=duration,
+        asset_id="asset-id",
+        asset_name="orders",
+        asset_path="/tmp/orders",
+    )
+
+
+async def test_run_history_queries(isolated_filesystem):
+    # A run is recorded when it starts and again when it finishes
+    started = _run("run-1", datetime(2024, 1, 5, tzinfo=timezone.utc))
+    await started.persist(status=ManifestRunStatus.UNKNOWN, update_manifest=False)
+    finished = _run("run-1", datetime(2024, 1, 5, tzinfo=timezone.utc), 100)
+    await finished.persist(status=ManifestRunStatus.SUCCESS)
+
+    await _run("run-2", datetime(2024, 2, 1, tzinfo=timezone.utc), 200).persist()
+    await _run("run-3", datetime(2024, 2, 3, tzinfo=timezone.utc), 300).persist()
+    await _run("run-4", datetime(2024, 2, 4, tzinfo=timezone.utc)).persist(
+        status=ManifestRunStatus.FAILED, error="boom"
+    )
+
+    fs = await mad_filesystems.get_fs()
+    assert len(fs.glob(f"{RUN_HISTORY_LOCATION}/asset_name=orders/month=*/*")) == 5
+
+    last_runs = await get_last_runs("orders", 3)
+    assert last_runs is not None
+    assert [(r[0], r[8]) for r in last_runs.fetchall()] == [
+        ("run-4", "failed"),
+        ("run-3", "success"),
+        ("run-2", "success"),
+    ]
+
+    history = await get_run_history("orders", "asset-id")
+    assert history is not None
+    assert sorted(history.select("id, status").fetchall()) == [
+        ("run-1", "success"),
+        ("run-2", "success"),
+        ("run-3", "success"),
+        ("run-4", "failed"),
+    ]
+
+    since = await get_run_history(
+        "orders", since=datetime(2024, 2, 2, tzinfo=timezone.utc)
+    )
+    assert since is not None
+    assert sorted(r[0] for r in since.select("id").fetchall()) == ["run-3", "run-4"]
+
+    assert await get_duration_percentiles("orders", [0.0, 0.5, 1.0]) == {
+        0.0: 100.0,
+        0.5: 200.0,
+        1.0: 300.0,
+    }
+    assert await get_last_successful_materialization("orders") == datetime(
+        2024, 2, 3, tzinfo=timezone.utc
+    )
+    assert await get_last_successful_materialization("orders", "other-id") is None
+    assert await get_last_runs("customers") is None
+
+
+async def test_backfill_run_history(isolated_filesystem):
+    fs = await mad_filesystems.get_fs()
+
+    for run in [
+        _run("run-1", datetime(2023, 12, 31, tzinfo=timezone.utc), 100),
+        _run("run-2", datetime(2024, 1, 1, tzinfo=timezone.utc)),
+    ]:
+        legacy_path = (
+            f"{ASSET_METADATA_LOCATION}/asset_name=orders/asset_id=asset-id/"
+            f"asset_run_id={run.id}/metadata.json"
+        )
+        # Written the way runs were persisted before the run history
+        await fs.write_data(legacy_path, run)
+
+    # Without a history the legacy metadata is read
+    assert await get_run_history("orders") is None
+    relation = await get_asset_metadata("orders", "asset-id")
+    assert relation is not None and len(relation.fetchall()) == 2
+
+    assert await backfill_run_history() == 2
+    assert await backfill_run_history(["orders"]) == 0
+
+    history = await get_asset_metadata("orders", "asset-id")
+    assert history is not None
+    assert "status" in history.columns
+    assert sorted(history.select("id, status").fetchall()) == [
+        ("run-1", "success"),
+        ("run-2", "unknown"),
+    ]
+    assert sorted(
+        fs.glob(f"{RUN_HISTORY_LOCATION}/asset_name=orders/*")
+    ) == [
+        f"{RUN_HISTORY_LOCATION}/asset_name=orders/month=2023-12",
+        f"{RUN_HISTORY_LOCATION}/asset_name=orders/month=2024-01",
+    ]
+    assert await get_last_successful_materialization("orders") == datetime(
+        2023, 12, 31, tzinfo=timezone.utc
+    )
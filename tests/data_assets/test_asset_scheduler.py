@@ -0,0 +1,132 @@
+import asyncio
+from uuid import uuid4
+import pytest
+from mad_prefect.data_assets import asset
+from mad_prefect.data_assets.asset_scheduler import (
+    AssetScheduler,
+    materialize_assets,
+    upstream_assets,
+)
+from mad_prefect.data_assets.data_asset import DataAsset
+from mad_prefect.filesystems import get_fs
+
+
+class Tracker:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.calls: list[str] = []
+
+    async def run(self, name: str, seconds: float = 0.05):
+        self.calls.append(name)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(seconds)
+        self.running -= 1
+
+
+@pytest.fixture
+async def base_path():
+    base_path = f"tests/asset_scheduler/{uuid4().hex}"
+    yield base_path
+    fs = await get_fs()
+    await fs.delete_path(base_path, recursive=True)
+
+
+def bronze_assets(base_path: str, tracker: Tracker, count: int) -> list[DataAsset]:
+    def bronze(n: int):
+        @asset(f"{base_path}/bronze_{n}.parquet", name=f"bronze_{n}")
+        async def bronze_asset():
+            await tracker.run(f"bronze_{n}")
+            return [{"n": n}]
+
+        return bronze_asset
+
+    return [bronze(n) for n in range(count)]
+
+
+@pytest.mark.parametrize("fragment_target_rows", [None, 4])
+async def test_yielded_assets_are_materialized_concurrently(
+    base_path, fragment_target_rows
+):
+    tracker = Tracker()
+    bronze = bronze_assets(base_path, tracker, 10)
+
+    @asset(f"{base_path}/silver.parquet", fragment_target_rows=fragment_target_rows)
+    async def silver():
+        for bronze_asset in bronze:
+            yield bronze_asset
+
+    result = await silver.query("SELECT list(n ORDER BY n)")
+    assert result and result.fetchone() == (list(range(10)),)
+    assert tracker.peak == AssetScheduler().max_concurrency
+
+
+async def test_upstream_assets_are_materialized_once_before_the_asset(base_path):
+    tracker = Tracker()
+    orders, customers = bronze_assets(base_path, tracker, 2)
+
+    @asset(f"{base_path}/silver.parquet")
+    async def silver(orders: DataAsset, customers: DataAsset):
+        # Upstream assets materialized by the scheduler are reused
+        tracker.calls.append("silver")
+        yield await orders()
+        yield await customers()
+
+    @asset(f"{base_path}/gold.parquet")
+    async def gold(silver: DataAsset, orders: DataAsset):
+        tracker.calls.append("gold")
+        yield await silver()
+        yield await orders()
+
+    silver_asset = silver.with_arguments(orders, customers)
+    gold_asset = gold.with_arguments(silver_asset, orders)
+    assert upstream_assets(gold_asset) == [silver_asset, orders]
+
+    [artifact] = await materialize_assets(gold_asset, max_concurrency=2)
+
+    assert artifact.path == f"{base_path}/gold.parquet"
+    assert sorted(tracker.calls[:2]) == ["bronze_0", "bronze_1"]
+    assert tracker.calls[2:] == ["silver", "gold"]
+    assert tracker.peak == 2
+
+
+async def test_concurrency_limit(base_path):
+    tracker = Tracker()
+    bronze = bronze_assets(base_path, tracker, 5)
+
+    artifacts = await materialize_assets(*bronze, max_concurrency=2)
+
+    assert [a.path for a in artifacts] == [
+        f"{base_path}/bronze_{n}.parquet" for n in range(5)
+    ]
+    assert tracker.peak == 2
+    assert sorted(tracker.calls) == [f"bronze_{n}" for n in range(5)]
+
+
+async def test_failures_cancel_the_other_assets(base_path):
+    tracker = Tracker()
+
+    @asset(f"{base_path}/slow.parquet")
+    async def slow():
+        await tracker.run("slow", 10)
+        return [{"n": 1}]
+
+    @asset(f"{base_path}/failing.parquet")
+    async def failing():
+        # Fail once the slow asset is running
+        while not tracker.running:
+            await asyncio.sleep(0.01)
+
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await materialize_assets(slow, failing)
+
+    # The slow asset was cancelled mid-run
+    assert tracker.running == 1
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        AssetScheduler(-1)
@@ -0,0 +1,97 @@
+from uuid import uuid4
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from mad_prefect.data_assets.batching import (
+    MIN_BATCH_ROWS,
+    estimate_row_bytes,
+    read_sized_batches,
+    sized_batches,
+)
+from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.duckdb import get_connection_pool
+from mad_prefect.filesystems import get_fs
+
+
+def test_estimate_row_bytes_follows_the_schema():
+    narrow = duckdb.sql("SELECT 1::INTEGER AS a, 2::BIGINT AS b")
+    wide = duckdb.sql(
+        "SELECT 'x' AS a, {'k': 1, 'l': [1, 2]} AS b, [1, 2, 3] AS c, 1.5::DECIMAL(10, 2) AS d"
+    )
+
+    assert estimate_row_bytes(narrow) == 5 + 9
+    assert estimate_row_bytes(wide) > estimate_row_bytes(narrow)
+
+
+def test_sized_batches_combines_small_and_splits_large_batches():
+    small = pa.record_batch({"id": pa.array(range(100), pa.int64())})
+    large = pa.record_batch({"id": pa.array(range(10_000), pa.int64())})
+
+    batches = list(sized_batches([small] * 20 + [large], target_bytes=8_000))
+
+    # 10 small batches (8,000 bytes) are combined, the large one is sliced to 1,000 rows
+    assert [b.num_rows for b in batches] == [1_000, 1_000] + [1_000] * 10
+    assert sum(b.num_rows for b in batches) == 12_000
+
+
+def test_read_sized_batches_reads_narrow_relations_in_large_batches():
+    relation = duckdb.sql("SELECT range AS id FROM range(100000)")
+
+    reader, batches = read_sized_batches(relation, target_bytes=400_000)
+    try:
+        row_counts = [b.num_rows for b in batches]
+    finally:
+        reader.close()
+
+    assert sum(row_counts) == 100_000
+    assert len(row_counts) < 100_000 / 1000
+    assert all(rows >= MIN_BATCH_ROWS for rows in row_counts[:-1])
+
+
+async def test_parquet_row_groups_follow_target_batch_bytes():
+    fs = await get_fs()
+    path = f"tests/batching/{uuid4().hex}/rows.parquet"
+    data = pd.DataFrame({"id": range(50_000), "value": [1.5] * 50_000})
+
+    try:
+        artifact = DataArtifact(path, data, target_batch_bytes=160_000)
+        assert await artifact.persist()
+
+        pool = await get_connection_pool()
+        row_groups = pool.connection.execute(
+            f"SELECT row_group_num_rows FROM parquet_metadata('mad://{path}') "
+            "GROUP BY row_group_id, row_group_num_rows ORDER BY row_group_id"
+        ).fetchall()
+
+        # 16 bytes a row, so each row group holds 10,000 rows
+        assert [rows for (rows,) in row_groups] == [10_000] * 5
+    finally:
+        await fs.delete_path(path.rsplit("/", 1)[0], recursive=True)
+
+
+async def test_relation_copy_row_groups_follow_target_batch_bytes():
+    fs = await get_fs()
+    base_path = f"tests/batching/{uuid4().hex}"
+    pool = await get_connection_pool()
+    relation = pool.connection.query(
+        "SELECT range AS id, 1.5::DOUBLE AS value FROM range(50000)"
+    )
+
+    async def row_groups(artifact: DataArtifact):
+        assert await artifact.persist()
+        return pool.connection.execute(
+            f"SELECT COUNT(DISTINCT row_group_id) FROM parquet_metadata('mad://{artifact.path}')"
+        ).fetchone()
+
+    try:
+        # DuckDB's default row groups hold far more than 50,000 rows
+        default = DataArtifact(f"{base_path}/default.parquet", relation)
+        assert await row_groups(default) == (1,)
+
+        sized = DataArtifact(
+            f"{base_path}/sized.parquet", relation, target_batch_bytes=160_000
+        )
+        (count,) = await row_groups(sized)
+        assert count > 1
+    finally:
+        await fs.delete_path(base_path, recursive=True)
@@ -0,0 +1,120 @@
+from uuid import uuid4
+import pytest
+from mad_prefect.data_assets import asset
+from mad_prefect.data_assets.asset_metadata import AssetManifest, AssetManifestRun
+from mad_prefect.data_assets.compaction import (
+    COMPACTION_STAGING_DIR,
+    compact_artifacts,
+)
+from mad_prefect.data_assets.data_artifact_collector import DataArtifactCollector
+from mad_prefect.duckdb import get_connection_pool
+from mad_prefect.filesystems import get_fs
+
+
+async def collect_pages(dir: str, pages: int, filetype="json"):
+    async def producer():
+        for page in range(pages):
+            yield [{"page": page, "row": row} for row in range(100)]
+
+    await DataArtifactCollector(producer(), dir, filetype).collect()
+
+
+@pytest.mark.parametrize("filetype", ["json", "parquet"])
+async def test_compact_artifacts_per_partition(filetype):
+    fs = await get_fs()
+    pool = await get_connection_pool()
+    base_path = f"tests/compaction/{uuid4().hex}"
+
+    await collect_pages(f"{base_path}/runtime=a", 6, filetype)
+    await collect_pages(f"{base_path}/runtime=b", 3, filetype)
+    # A partition with a single file has nothing to compact
+    await collect_pages(f"{base_path}/runtime=c", 1, filetype)
+
+    def totals():
+        return pool.connection.query(
+            f"SELECT runtime, COUNT(*), SUM(page * 100 + row) "
+            f"FROM read_{filetype}('mad://{base_path}/**/*.{filetype}', "
+            f"hive_partitioning = true) "
+            f"GROUP BY ALL ORDER BY ALL"
+        ).fetchall()
+
+    try:
+        before = totals()
+        # Each page is 100 rows of two bigints, ~1.6KB in Arrow
+        compactions = await compact_artifacts(base_path, target_file_bytes=8_000)
+
+        assert [c.partition for c in compactions] == [
+            f"{base_path}/runtime=a",
+            f"{base_path}/runtime=b",
+        ]
+        assert [len(c.source_paths) for c in compactions] == [6, 3]
+        assert [len(c.compacted_paths) for c in compactions] == [2, 1]
+
+        files = sorted(await fs.list_files(base_path))
+        assert files == sorted(
+            [p for c in compactions for p in c.compacted_paths]
+            + [f"{base_path}/runtime=c/fragment=0.{filetype}"]
+        )
+        assert totals() == before
+        assert not fs.glob(f"{COMPACTION_STAGING_DIR}/*")
+    finally:
+        await fs.delete_path(base_path, recursive=True)
+
+
+async def test_asset_compact_merges_snapshots():
+    fs = await get_fs()
+    base_path = f"tests/compaction/{uuid4().hex}"
+
+    @asset(
+        f"{base_path}/customers.parquet",
+        artifacts_dir=f"{base_path}/_artifacts",
+        snapshot_artifacts=True,
+    )
+    async def customers():
+        for page in range(4):
+            yield [{"id": page}]
+
+    try:
+        await customers()
+        await customers()
+        assert len(await fs.list_files(f"{base_path}/_artifacts")) == 8
+
+        compactions = await customers.compact()
+
+        assert len(compactions) == 2
+        assert len(await fs.list_files(f"{base_path}/_artifacts")) == 2
+
+        # Compacting again leaves the well-sized files alone
+        assert await customers.compact() == []
+    finally:
+        await fs.delete_path(base_path, recursive=True)
+
+
+def test_manifest_replaced_artifacts():
+    manifest = AssetManifest(
+        asset_name="customers",
+        asset_id="id",
+        last_run=AssetManifestRun(
+            id="run",
+            metadata_path="metadata.json",
+            artifact_paths=("a/fragment=0.json", "a/fragment=1.json", "b.json"),
+        ),
+        last_artifacts=("a/fragment=0.json", "a/fragment=1.json", "b.json"),
+    )
+
+    replaced = manifest.with_replaced_artifacts(
+        {
+            "a/fragment=0.json": ("a/compacted=x-0.json",),
+            "a/fragment=1.json": ("a/compacted=x-0.json",),
+        }
+    )
+
+    assert replaced.last_artifacts == ("a/compacted=x-0.json", "b.json")
+    assert replaced.last_run is not None
+    assert replaced.last_run.artifact_paths == replaced.last_artifacts
+    assert replaced.updated_at >= manifest.updated_at
+
+
+async def test_min_fragments_must_be_at_least_two():
+    with pytest.raises(ValueError, match="min_fragments"):
+        await compact_artifacts("tests/compaction", min_fragments=1)
@@ -0,0 +1,249 @@
+from uuid import uuid4
+import pyarrow as pa
+import pytest
+from mad_prefect.data_assets import asset
+from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.data_assets.options import WriteParquetOptions
+from mad_prefect.data_assets.serialization import align_to_schema
+from mad_prefect.duckdb import get_connection_pool
+from mad_prefect.filesystems import get_fs
+
+
+async def _persist_pages(pages: list, **kwargs):
+    async def yield_pages():
+        for page in pages:
+            yield page
+
+    artifact = DataArtifact(
+        f"tests/data_artifact/{uuid4().hex}/pages.parquet", yield_pages(), **kwargs
+    )
+    return artifact, await artifact.persist()
+
+
+async def test_parquet_schema_inferred_from_buffered_batches():
+    fs = await get_fs()
+    artifact, persisted = await _persist_pages(
+        [
+            [{"id": 1, "name": None}],
+            [{"name": "b", "id": 2, "amount": 1.5}],
+            [{"id": 3}],
+        ],
+        schema_inference_batches=3,
+    )
+
+    try:
+        assert persisted
+        query = await artifact.query("SELECT * ORDER BY id")
+        assert query is not None
+        assert query.columns == ["id", "name", "amount"]
+        assert query.fetchall() == [(1, None, None), (2, "b", 1.5), (3, None, None)]
+    finally:
+        await fs.delete_path(artifact.path.rsplit("/", 1)[0], recursive=True)
+
+
+async def test_parquet_batches_after_inference_are_aligned():
+    fs = await get_fs()
+    artifact, persisted = await _persist_pages(
+        [[{"id": 1, "amount": 1.5}], [{"amount": 2}], [{"id": 3}]],
+        schema_inference_batches=1,
+    )
+
+    try:
+        assert persisted
+        query = await artifact.query("SELECT id, amount ORDER BY amount NULLS LAST")
+        assert query is not None
+        assert query.fetchall() == [(1, 1.5), (None, 2.0), (3, None)]
+    finally:
+        await fs.delete_path(artifact.path.rsplit("/", 1)[0], recursive=True)
+
+
+@pytest.mark.parametrize(
+    "drifted_page, error",
+    [
+        ([{"id": 2, "extra": True}], "aren't in the file's schema"),
+        ([{"id": "two"}], "Cannot cast column 'id'"),
+    ],
+)
+async def test_parquet_incompatible_drift_raises(drifted_page, error):
+    fs = await get_fs()
+
+    try:
+        with pytest.raises(ValueError, match=error):
+            await _persist_pages(
+                [[{"id": 1}], drifted_page], schema_inference_batches=1
+            )
+    finally:
+        await fs.delete_path("tests/data_artifact", recursive=True)
+
+
+def test_align_to_schema_returns_matching_batches_as_is():
+    batch = pa.RecordBatch.from_pylist([{"id": 1, "name": "a"}])
+
+    assert align_to_schema(batch, batch.schema) is batch
+
+
+def test_schema_inference_batches_must_be_positive():
+    with pytest.raises(ValueError, match="schema_inference_batches"):
+        DataArtifact("tests/data_artifact/invalid.parquet", schema_inference_batches=0)
+
+
+@pytest.mark.parametrize("source", ["python", "relation"])
+async def test_write_parquet_options(source):
+    fs = await get_fs()
+    base_path = f"tests/data_artifact/{uuid4().hex}"
+    pool = await get_connection_pool()
+    data = (
+        [{"id": i, "code": f"code {i % 10}"} for i in range(10_000)]
+        if source == "python"
+        else pool.connection.query(
+            "SELECT range AS id, 'code ' || (range % 10) AS code FROM range(10000)"
+        )
+    )
+    artifact = DataArtifact(
+        f"{base_path}/options.parquet",
+        data,
+        write_parquet_options=WriteParquetOptions(
+            compression="zstd",
+            compression_level=5,
+            row_group_size=4_096,
+            use_dictionary=False,
+            bloom_filter_columns=["code"],
+        ),
+    )
+
+    try:
+        assert await artifact.persist()
+        metadata = pool.connection.execute(
+            f"SELECT DISTINCT row_group_id, row_group_num_rows, compression, encodings "
+            f"FROM parquet_metadata('mad://{artifact.path}') ORDER BY row_group_id"
+        ).fetchall()
+
+        assert [rows for _, rows, _, _ in metadata] == [4_096, 4_096, 1_808]
+        assert {compression for _, _, compression, _ in metadata} == {"ZSTD"}
+        assert not any("DICTIONARY" in encodings for _, _, _, encodings in metadata)
+    finally:
+        await fs.delete_path(base_path, recursive=True)
+
+
+async def test_pyarrow_bloom_filters_for_listed_columns():
+    fs = await get_fs()
+    pool = await get_connection_pool()
+    artifact = DataArtifact(
+        f"tests/data_artifact/{uuid4().hex}/bloom.parquet",
+        [{"id": i, "code": f"code {i}"} for i in range(100)],
+        write_parquet_options=WriteParquetOptions(
+            bloom_filter_columns=["code"], bloom_filter_fpp=0.01
+        ),
+    )
+
+    try:
+        assert await artifact.persist()
+        bloom_filters = pool.connection.execute(
+            f"SELECT path_in_schema, bloom_filter_offset IS NOT NULL "
+            f"FROM parquet_metadata('mad://{artifact.path}') ORDER BY column_id"
+        ).fetchall()
+
+        assert bloom_filters == [("id", False), ("code", True)]
+    finally:
+        await fs.delete_path(artifact.path.rsplit("/", 1)[0], recursive=True)
+
+
+@pytest.mark.parametrize(
+    "path, compression, magic",
+    [
+        ("customers.json.gz|csv.gz", "gzip", b"\x1f\x8b"),
+        ("customers.jsonl.zst", "zstd", b"\x28\xb5\x2f\xfd"),
+        ("customers.csv.gz", "gzip", b"\x1f\x8b"),
+    ],
+)
+async def test_compressed_artifacts(path, compression, magic):
+    fs = await get_fs()
+    base_path = f"tests/data_artifact/{uuid4().hex}"
+    filetype = path.split(".")[1].replace("jsonl", "json")
+
+    @asset(
+        f"{base_path}/{path}",
+        artifacts_dir=f"{base_path}/_artifacts",
+        artifact_filetype=filetype,
+        artifact_compression=compression,
+    )
+    async def customers():
+        yield [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+        yield [{"id": 3, "name": "c"}]
+
+    try:
+        result = await customers()
+        assert result.compression == compression
+
+        # Fragments and results are compressed as they're written
+        written = [
+            p for p in fs.glob(f"{base_path}/**") if p.endswith((".gz", ".zst"))
+        ]
+        assert len(written) == 2 + len(path.split("|"))
+
+        for written_path in written:
+            assert (await fs.read_path(written_path))[: len(magic)] == magic
+
+        query = await customers.query("SELECT COUNT(*), SUM(id)")
+        assert query is not None
+        assert query.fetchone() == (3, 6)
+    finally:
+        await fs.delete_path(base_path, recursive=True)
+
+
+def test_parquet_artifacts_cannot_be_compressed():
+    with pytest.raises(ValueError, match="write_parquet_options"):
+        DataArtifact("tests/data_artifact/customers.parquet.gz")
+
+
+@pytest.mark.parametrize("path", ["customers.arrow", "customers.feather|parquet"])
+async def test_arrow_artifacts(path):
+    fs = await get_fs()
+    base_path = f"tests/data_artifact/{uuid4().hex}"
+
+    @asset(
+        f"{base_path}/{path}",
+        artifacts_dir=f"{base_path}/_artifacts",
+        artifact_filetype="arrow",
+    )
+    async def customers():
+        yield [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+        # Fragments are unioned by name, like Parquet fragments
+        yield [{"id": 3.5, "active": True}]
+
+    try:
+        result = await customers()
+        assert result.filetype == "arrow"
+
+        fragments = fs.glob(f"{base_path}/_artifacts/**/*.arrow")
+        assert len(fragments) == 2
+
+        # Arrow IPC files start with their magic bytes
+        for written_path in fragments + [result.path]:
+            assert (await fs.read_path(written_path))[:6] == b"ARROW1"
+
+        query = await customers.query("SELECT id, name, active WHERE id > 1 ORDER BY id")
+        assert query is not None
+        assert query.fetchall() == [(2.0, "b", None), (3.5, None, True)]
+    finally:
+        await fs.delete_path(base_path, recursive=True)
+
+
+async def test_relations_persisted_as_arrow():
+    fs = await get_fs()
+    pool = await get_connection_pool()
+    base_path = f"tests/data_artifact/{uuid4().hex}"
+    artifact = DataArtifact(
+        f"{base_path}/numbers.arrow",
+        pool.connection.query("SELECT range AS n, range % 3 AS m FROM range(10000)"),
+        target_batch_bytes=16 * 1024,
+    )
+
+    try:
+        assert await artifact.persist()
+
+        query = await artifact.query("SELECT COUNT(*), SUM(n) WHERE m = 0")
+        assert query is not None
+        assert query.fetchone() == (3334, sum(range(0, 10000, 3)))
+    finally:
+        await fs.delete_path(base_path, recursive=True)
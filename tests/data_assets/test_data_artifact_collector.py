@@ -0,0 +1,162 @@
+import asyncio
+from uuid import uuid4
+import pytest
+from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.data_assets.data_artifact_collector import DataArtifactCollector
+from mad_prefect.data_assets.data_artifact_query import DataArtifactQuery
+from mad_prefect.filesystems import get_fs
+
+
+async def test_collect_pipelines_persists_in_yield_order(monkeypatch):
+    active = 0
+    peak = 0
+
+    async def fake_persist(self: DataArtifact):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+
+        # Earlier fragments take longer, so writes complete out of order
+        fragment_num = int(self.path.split("fragment=")[1].split(".")[0])
+        await asyncio.sleep(0.01 * (6 - fragment_num))
+
+        active -= 1
+        self.persisted = True
+        return True
+
+    monkeypatch.setattr(DataArtifact, "persist", fake_persist)
+
+    async def producer():
+        for i in range(6):
+            yield [{"page": i}]
+            yield []
+
+    collector = DataArtifactCollector(
+        producer(),
+        "tests/collector/pipelined",
+        max_in_flight_persists=3,
+    )
+    artifacts = await collector.collect()
+
+    assert [a.path for a in artifacts] == [
+        f"tests/collector/pipelined/fragment={i}.json" for i in range(6)
+    ]
+    assert peak == 3
+
+
+async def test_collect_pipelined_fragments_are_queryable():
+    base_dir = f"tests/collector/{uuid4().hex}"
+
+    async def producer():
+        for i in range(5):
+            yield [{"page": i, "value": i * 10}]
+
+    collector = DataArtifactCollector(producer(), base_dir, max_in_flight_persists=4)
+
+    try:
+        artifacts = await collector.collect()
+        assert len(artifacts) == 5
+
+        query = await DataArtifactQuery(artifacts).query("SELECT SUM(value) s")
+        assert query
+        result = query.fetchone()
+        assert result and result[0] == 100
+    finally:
+        fs = await get_fs()
+        await fs.delete_path(base_dir, recursive=True)
+
+
+def test_collector_rejects_invalid_in_flight_limit():
+    with pytest.raises(ValueError):
+        DataArtifactCollector([], "tests/collector/invalid", max_in_flight_persists=0)
+
+
+@pytest.mark.parametrize(
+    "target, expected_rows",
+    [
+        ({"fragment_target_rows": 250}, [300, 300, 300, 100]),
+        # Each page of JSON is ~2.3KB, files roll once they pass 4KB
+        ({"fragment_target_bytes": 4_000}, [200, 200, 200, 200, 200]),
+    ],
+)
+async def test_collect_coalesces_fragments(target, expected_rows):
+    base_dir = f"tests/collector/{uuid4().hex}"
+
+    async def producer():
+        for page in range(10):
+            yield [{"page": page, "row": row} for row in range(100)]
+            yield []
+
+    collector = DataArtifactCollector(
+        producer(), base_dir, max_in_flight_persists=2, **target
+    )
+
+    try:
+        artifacts = await collector.collect()
+
+        # Files are numbered contiguously
+        assert [a.path for a in artifacts] == [
+            f"{base_dir}/fragment={i}.json" for i in range(len(expected_rows))
+        ]
+
+        rows = []
+        for artifact in artifacts:
+            query = await artifact.query("SELECT COUNT(*)")
+            assert query
+            rows.append(query.fetchone()[0])
+        assert rows == expected_rows
+
+        query = await DataArtifactQuery(artifacts).query("SELECT SUM(page)")
+        assert query
+        assert query.fetchone() == (sum(range(10)) * 100,)
+    finally:
+        fs = await get_fs()
+        await fs.delete_path(base_dir, recursive=True)
+
+
+async def test_coalesced_collection_keeps_yielded_artifacts_in_order():
+    base_dir = f"tests/collector/{uuid4().hex}"
+
+    async def producer():
+        yield [{"id": 1}]
+        yield [{"id": 2}]
+        yield DataArtifact(f"{base_dir}/yielded.json", [{"id": 3}])
+        yield [{"id": 4}]
+
+    collector = DataArtifactCollector(producer(), base_dir, fragment_target_rows=10)
+
+    try:
+        artifacts = await collector.collect()
+
+        assert [a.path for a in artifacts] == [
+            f"{base_dir}/fragment=0.json",
+            f"{base_dir}/yielded.json",
+            f"{base_dir}/fragment=1.json",
+        ]
+    finally:
+        fs = await get_fs()
+        await fs.delete_path(base_dir, recursive=True)
+
+
+async def test_coalesced_collection_surfaces_write_errors(monkeypatch):
+    async def failing_persist(self: DataArtifact):
+        async for _ in self.data:  # type: ignore
+            raise RuntimeError("write failed")
+
+    monkeypatch.setattr(DataArtifact, "persist", failing_persist)
+
+    async def producer():
+        for page in range(10):
+            yield [{"page": page}]
+
+    collector = DataArtifactCollector(
+        producer(), "tests/collector/failing", fragment_target_rows=2
+    )
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        await collector.collect()
+
+
+def test_collector_rejects_invalid_fragment_targets():
+    with pytest.raises(ValueError, match="fragment_target_rows"):
+        DataArtifactCollector([], "tests/collector/invalid", fragment_target_rows=0)
@@ -0,0 +1,44 @@
+from uuid import uuid4
+from mad_prefect.data_assets import asset
+from mad_prefect.data_assets.data_artifact import DataArtifact
+from mad_prefect.data_assets.data_artifact_query import DataArtifactQuery
+
+
+async def test_copy_to_multi_format_reads_fragments_once(monkeypatch):
+    built_queries: list[list[str]] = []
+    build_query = DataArtifactQuery._build_query
+
+    def record_build_query(self, connection, filetype, artifact_paths):
+        built_queries.append(artifact_paths)
+        return build_query(self, connection, filetype, artifact_paths)
+
+    monkeypatch.setattr(DataArtifactQuery, "_build_query", record_build_query)
+    base_path = f"tests/copy_to/{uuid4().hex}"
+
+    @asset(f"{base_path}/customers.json|parquet|csv", artifacts_dir=base_path)
+    async def customers():
+        yield [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+        yield [{"id": 3, "name": "c"}]
+
+    result = await customers()
+    assert result.path == f"{base_path}/customers.json"
+
+    # The fragments are scanned once and fanned out, no result file is read back
+    assert len(built_queries) == 1
+    assert len(built_queries[0]) == 2
+
+    for filetype in ["json", "parquet", "csv"]:
+        artifact = DataArtifact(f"{base_path}/customers.{filetype}")
+        assert await artifact.exists()
+
+        totals = await artifact.query("SELECT COUNT(*), SUM(id)")
+        assert totals is not None
+        assert totals.fetchone() == (3, 6)
+
+
+async def test_copy_to_without_persisted_artifacts():
+    artifact_query = DataArtifactQuery([DataArtifact("tests/copy_to/missing.json")])
+    result = DataArtifact(f"tests/copy_to/{uuid4().hex}.parquet")
+
+    assert not await artifact_query.copy_to([result])
+    assert not await result.exists()
@@ -936,3 +936,74 @@ async def test_query_with_named_parameters_in_list():
 
     products = sorted([row[1] for row in filtered_data])
     assert products == ["Monitor", "Mouse"]
+
+
+async def test_concurrent_calls_share_one_materialization():
+    base_path = f"tests/single_flight/{uuid4().hex}"
+    calls = []
+
+    @asset(f"{base_path}/orders.parquet")
+    async def orders(region: str):
+        calls.append(region)
+        await asyncio.sleep(0.05)
+        return [{"region": region}]
+
+    try:
+        # Separate instances with the same arguments have the same asset id
+        first, second, other = await asyncio.gather(
+            orders.with_arguments("north")(),
+            orders.with_arguments("north")(),
+            orders.with_arguments("south")(),
+        )
+
+        assert first is second
+        assert other is not first
+        assert sorted(calls) == ["north", "south"]
+
+        # Once it's finished, the asset is materialized again
+        await orders.with_arguments("north")()
+        assert sorted(calls) == ["north", "north", "south"]
+    finally:
+        fs = await get_fs()
+        await fs.delete_path(base_path, recursive=True)
+
+
+async def test_concurrent_calls_share_a_failure():
+    calls = []
+
+    @asset(f"tests/single_flight/{uuid4().hex}/failing.parquet")
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(failing(), failing(), return_exceptions=True)
+
+    assert [str(r) for r in results] == ["boom", "boom"]
+    assert calls == [1]
+
+
+async def test_waiting_call_materializes_when_the_first_call_is_cancelled():
+    base_path = f"tests/single_flight/{uuid4().hex}"
+    calls = []
+
+    @asset(f"{base_path}/slow.parquet")
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return [{"id": 1}]
+
+    try:
+        first = asyncio.ensure_future(slow())
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(slow())
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        artifact = await second
+        assert artifact.path == f"{base_path}/slow.parquet"
+        assert first.cancelled()
+        assert calls == [1, 1]
+    finally:
+        fs = await get_fs()
+        await fs.delete_path(base_path, recursive=True)
@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+import json
+import sys
+from uuid import UUID, uuid4
+import duckdb
+import pyarrow as pa
+import pytest
+from pydantic import BaseModel
+from mad_prefect.data_assets import asset
+from mad_prefect.data_assets import serialization
+from mad_prefect.data_assets.serialization import (
+    encode_arrow_jsonl,
+    encode_jsonl,
+    run_serializer,
+    to_record_batch,
+    to_table,
+)
+from mad_prefect.data_assets.utils import safe_truthy
+
+
+@pytest.mark.parametrize("encoder", ["standard", "orjson"])
+def test_encode_jsonl_matches_mad_json_encoder_contract(encoder):
+    content = encode_jsonl(
+        [
+            {
+                "amount": Decimal("1.5"),
+                "created": datetime(2024, 1, 2, 3, 4, 5),
+                "id": UUID("951c58e4-b9a4-4478-883e-22760064e416"),
+            },
+            {"amount": Decimal("2"), "created": None, "id": None},
+        ],
+        encoder,
+    )
+
+    lines = content.decode().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {
+        "amount": 1.5,
+        "created": "2024-01-02 03:04:05.000000",
+        "id": "951c58e4-b9a4-4478-883e-22760064e416",
+    }
+
+
+def test_orjson_encoder_dumps_models_and_wide_integers():
+    class Event(BaseModel):
+        at: datetime
+
+    content = encode_jsonl(
+        [{"event": Event(at=datetime(2024, 1, 2))}, {"big": 2**70}], "orjson"
+    )
+
+    assert content.decode().splitlines() == [
+        '{"event":{"at":"2024-01-02 00:00:00.000000"}}',
+        f'{{"big": {2**70}}}',
+    ]
+
+
+def test_orjson_encoder_requires_orjson(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+
+    with pytest.raises(ImportError, match="pip install orjson"):
+        encode_jsonl([{"value": 1}], "orjson")
+
+
+def test_encode_arrow_jsonl_matches_encode_jsonl():
+    records = [
+        {
+            "amount": Decimal("1.5"),
+            "created": datetime(2024, 1, 2, 3, 4, 5),
+            "id": UUID("951c58e4-b9a4-4478-883e-22760064e416"),
+            "address": {"city": "Perth", "tags": ["a", "b"]},
+        },
+        {"amount": None, "created": None, "id": None, "address": None},
+        {
+            "amount": Decimal("2"),
+            "created": datetime(2024, 1, 2, 3, 4, 5, 123456),
+            "id": UUID("00000000-0000-0000-0000-000000000000"),
+            "address": {"city": 'Say "hi"\n', "tags": []},
+        },
+    ]
+    batch = pa.RecordBatch.from_pylist(records)
+
+    with duckdb.connect() as connection:
+        # Sliced batches start part way through their string buffers
+        buffers = encode_arrow_jsonl(connection, batch.slice(1))
+
+    lines = b"".join(buffers).decode().splitlines()
+    expected = encode_jsonl(records[1:]).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [json.loads(e) for e in expected]
+    assert json.loads(lines[1])["created"] == "2024-01-02 03:04:05.123456"
+
+
+def test_encode_arrow_jsonl_with_empty_batch():
+    batch = pa.RecordBatch.from_pylist([], schema=pa.schema([("id", pa.int64())]))
+
+    with duckdb.connect() as connection:
+        assert b"".join(encode_arrow_jsonl(connection, batch)) == b""
+
+
+def test_encode_jsonl_wraps_single_objects():
+    assert encode_jsonl({"value": 1}) == b'{"value": 1}\n'
+    assert encode_jsonl([]) == b""
+
+
+def test_to_record_batch_sanitizes_empty_structs():
+    batch = to_record_batch([{"id": 1, "empty": {}, "nested": {"empty": {}}}])
+    assert batch.num_rows == 1
+    assert batch.column("empty").null_count == 1
+
+
+def test_to_record_batch_sanitizes_empty_structs_in_nested_columns():
+    batch = to_record_batch(
+        [
+            {"id": 1, "items": [{}], "nested": {"empty": {}, "value": 1}},
+            {"id": 2, "items": None, "nested": None},
+        ]
+    )
+
+    assert batch.to_pylist() == [
+        {"id": 1, "items": [None], "nested": {"empty": None, "value": 1}},
+        {"id": 2, "items": None, "nested": None},
+    ]
+
+
+def test_to_record_batch_dumps_models_through_the_type_adapter():
+    class Address(BaseModel):
+        city: str
+
+    @dataclass
+    class Customer:
+        id: int
+        address: Address
+
+    expected = [{"id": 1, "address": {"city": "Perth"}}]
+
+    batch = to_record_batch([{"id": 1, "address": Address(city="Perth")}])
+    assert batch.to_pylist() == expected
+    assert to_table([Customer(1, Address(city="Perth"))]).to_pylist() == expected
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+async def test_run_serializer_on_executor(executor):
+    content = await run_serializer(executor, encode_jsonl, [{"value": 1}])
+    assert content == b'{"value": 1}\n'
+
+
+def test_invalid_max_workers_raises_on_executor_creation(monkeypatch):
+    monkeypatch.setenv("SERIALIZATION_MAX_WORKERS", "many")
+    monkeypatch.setattr(serialization, "_executors", {})
+
+    with pytest.raises(ValueError, match="SERIALIZATION_MAX_WORKERS"):
+        serialization.get_serialization_executor("thread")
+
+
+@pytest.mark.parametrize("filetype", ["json", "parquet", "csv"])
+async def test_asset_with_thread_serialization_executor(filetype):
+    @asset(
+        f"tests/serialization/{uuid4().hex}.{filetype}",
+        artifact_filetype=filetype,
+        serialization_executor="thread",
+    )
+    async def executor_asset():
+        for page in range(3):
+            yield [{"page": page, "amount": Decimal("1.25")} for _ in range(10)]
+
+    query = await executor_asset.query("SELECT COUNT(*) c, SUM(amount) total")
+    assert safe_truthy(query)
+
+    result = query.fetchone()
+    assert result
+    assert result[0] == 30
+    assert float(result[1]) == 37.5
+
+
+async def test_asset_with_orjson_encoder():
+    @asset(f"tests/serialization/{uuid4().hex}.json", json_encoder="orjson")
+    async def orjson_asset():
+        created = datetime(2024, 1, 2, 3, 4, 5)
+        yield [{"id": i, "created": created, "amount": Decimal("1.5")} for i in range(3)]
+
+    query = await orjson_asset.query("SELECT COUNT(*), MIN(created), SUM(amount)")
+    assert safe_truthy(query)
+    assert query.fetchone() == (3, datetime(2024, 1, 2, 3, 4, 5), 4.5)
@@ -0,0 +1,59 @@
+import asyncio
+from typing import AsyncIterator
+import pytest
+from mad_prefect.data_assets.utils import fan_out
+
+
+async def test_fan_out_feeds_every_consumer_from_one_read():
+    reads: list[int] = []
+
+    def batches():
+        for i in range(5):
+            reads.append(i)
+            yield i
+
+    async def collect(branch: AsyncIterator[int]):
+        return [batch async for batch in branch]
+
+    async def total(branch: AsyncIterator[int]):
+        result = 0
+
+        async for batch in branch:
+            await asyncio.sleep(0)
+            result += batch
+
+        return result
+
+    assert await fan_out(batches(), [collect, total]) == [[0, 1, 2, 3, 4], 10]
+    assert reads == [0, 1, 2, 3, 4]
+
+
+async def test_fan_out_consumer_stopping_early_does_not_block():
+    async def first(branch: AsyncIterator[int]):
+        async for batch in branch:
+            return batch
+
+    async def count(branch: AsyncIterator[int]):
+        return len([batch async for batch in branch])
+
+    assert await fan_out(range(100), [first, count], max_buffered=1) == [0, 100]
+
+
+async def test_fan_out_consumer_error_cancels_the_others():
+    cancelled = asyncio.Event()
+
+    async def fail(branch: AsyncIterator[int]):
+        async for batch in branch:
+            raise ValueError(f"bad batch {batch}")
+
+    async def wait(branch: AsyncIterator[int]):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ValueError, match="bad batch 0"):
+        await fan_out(range(3), [fail, wait])
+
+    assert cancelled.is_set()
@@ -181,3 +181,160 @@ async def test_register_mad_protocol_reuses_filesystem(monkeypatch, tmp_path):
     await mad_duckdb.register_mad_protocol(conn)
 
     assert len(connection_calls) == 1
+
+
+async def test_connection_pool_applies_settings(sample_parquet):
+    from mad_prefect.duckdb import DuckDBSettings, get_connection_pool
+
+    settings = DuckDBSettings(
+        threads=1,
+        memory_limit="256MB",
+        preserve_insertion_order=False,
+    )
+    pool = await get_connection_pool(settings)
+
+    with pool.cursor() as cursor:
+        threads, preserve_insertion_order = cast(
+            tuple,
+            cursor.sql(
+                "SELECT current_setting('threads'), current_setting('preserve_insertion_order')"
+            ).fetchone(),
+        )
+
+        # The mad protocol is registered once for every cursor of the pool
+        count_row = cursor.sql("SELECT COUNT(*) FROM 'mad://sample1.parquet'").fetchone()
+
+    assert threads == 1
+    assert preserve_insertion_order is False
+    assert count_row and count_row[0] == 3
+
+    assert await get_connection_pool(settings) is pool
+
+
+async def test_connection_pool_reuses_released_cursors(sample_parquet):
+    from mad_prefect.duckdb import DuckDBSettings, get_connection_pool
+
+    pool = await get_connection_pool(DuckDBSettings(threads=2))
+
+    with pool.cursor() as cursor:
+        pass
+
+    assert pool.acquire() is cursor
+
+    # A checked out cursor is never handed out twice
+    other = pool.acquire()
+    assert other is not cursor
+
+    pool.release(other)
+    pool.release(cursor)
+
+    pool.close_idle_cursors()
+    assert not pool._idle_cursors
+
+
+async def test_concurrent_connection_pool_creation_builds_one_pool(sample_parquet):
+    import asyncio
+    from mad_prefect.duckdb import DuckDBSettings, get_connection_pool
+
+    settings = DuckDBSettings(threads=1, memory_limit="128MB")
+    pools = await asyncio.gather(*(get_connection_pool(settings) for _ in range(4)))
+
+    assert all(pool is pools[0] for pool in pools)
+
+
+async def test_default_pool_relations_work_with_default_connection(sample_parquet):
+    from uuid import uuid4
+    from mad_prefect.data_assets import asset
+
+    @asset(f"{uuid4().hex}/upstream.parquet", artifact_filetype="parquet")
+    async def upstream():
+        yield [{"a": 1}]
+        yield [{"a": 2}]
+
+    # Relations from assets can be mixed with the default connection in asset code
+    upstream_relation = await upstream.query()
+    result = duckdb.query("SELECT SUM(a) FROM upstream_relation").fetchone()
+
+    assert result == (3,)
+
+
+@pytest.fixture()
+def default_connection_threads():
+    original = cast(tuple, duckdb.sql("SELECT current_setting('threads')").fetchone())
+    yield
+    duckdb.execute(f"SET threads = {original[0]}")
+
+
+async def test_persisting_relations_with_many_threads(
+    sample_parquet, monkeypatch, default_connection_threads
+):
+    from uuid import uuid4
+    import pandas as pd
+    from mad_prefect import duckdb as mad_duckdb
+    from mad_prefect.data_assets import asset
+    from mad_prefect.data_assets.data_artifact import DataArtifact
+    from mad_prefect.duckdb import (
+        DuckDBSettings,
+        get_connection_pool,
+        get_relation_connection,
+    )
+
+    # The default pool applies the DUCKDB_* settings to the default connection
+    monkeypatch.setenv("DUCKDB_THREADS", "4")
+    monkeypatch.setattr(mad_duckdb, "_connection_pools", {})
+
+    @asset(f"{uuid4().hex}/threaded.parquet", artifact_filetype="parquet")
+    async def threaded():
+        yield [{"a": 1}, {"a": 2}]
+        yield pd.DataFrame({"a": [3, 4]})
+
+    threaded_relation = await threaded.query()
+    assert duckdb.query("SELECT SUM(a) FROM threaded_relation").fetchone() == (10,)
+
+    # Relations from a pool with its own database are copied on that database
+    pool = await get_connection_pool(DuckDBSettings(threads=4))
+    relation = pool.track(
+        pool.connection.query("SELECT * FROM 'mad://sample1.parquet'")
+    )
+    assert get_relation_connection(relation) is pool.connection
+
+    artifact = DataArtifact(f"{uuid4().hex}/copied.parquet", relation)
+    assert await artifact.persist()
+
+    # Don't check a relation's truthiness, `len()` on a relation can hang DuckDB
+    copied = await artifact.query("SELECT COUNT(*)")
+    assert copied is not None
+    assert copied.fetchone() == (3,)
+
+
+async def test_asset_duckdb_settings_scope_asset_queries(sample_parquet):
+    from uuid import uuid4
+    from mad_prefect.data_assets import asset
+    from mad_prefect.duckdb import DuckDBSettings, get_relation_connection
+
+    @asset(
+        f"{uuid4().hex}/limited.parquet",
+        artifact_filetype="parquet",
+        duckdb_settings=DuckDBSettings(threads=4, preserve_insertion_order=False),
+    )
+    async def limited_asset():
+        yield [{"id": 1}, {"id": 2}]
+        yield [{"id": 3}]
+
+    def current_threads(relation: duckdb.DuckDBPyRelation):
+        # The relation belongs to the asset's own connection
+        row = (
+            get_relation_connection(relation)
+            .execute("SELECT current_setting('threads'), COUNT(*) FROM relation")
+            .fetchone()
+        )
+        return cast(tuple, row)
+
+    assert current_threads(await limited_asset.query()) == (4, 3)
+
+    # with_options overrides the settings for the reconfigured asset only
+    reconfigured = limited_asset.with_options(
+        duckdb_settings=DuckDBSettings(threads=2)
+    )
+    assert current_threads(await reconfigured.query()) == (2, 3)
+    assert current_threads(await limited_asset.query()) == (4, 3)
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from uuid import uuid4
+import threading
+import fsspec
+from fsspec.asyn import AsyncFileSystem
+from fsspec.implementations.memory import MemoryFileSystem
+import pytest
+from mad_prefect.filesystems import FsspecFileSystem
+
+LATENCY_SECONDS = 0.05
+
+
+class SlowMemoryFileSystem(MemoryFileSystem):
+    """In-memory filesystem which blocks on every read to mimic a remote store."""
+
+    protocol = "slowmemory"
+
+    def cat_file(self, path, start=None, end=None, **kwargs):
+        time.sleep(LATENCY_SECONDS)
+        return super().cat_file(path, start=start, end=end, **kwargs)
+
+
+class SlowAsyncMemoryFileSystem(AsyncFileSystem):
+    """Minimal AsyncFileSystem whose coroutines sleep to mimic a remote store."""
+
+    protocol = "slowasyncmemory"
+    root_marker = ""
+    cachable = False
+    store: dict[str, bytes] = {}
+    call_threads: set[int] = set()
+
+    def _record_call(self):
+        self.call_threads.add(threading.get_ident())
+
+    async def _info(self, path, **kwargs):
+        self._record_call()
+        path = self._strip_protocol(path)
+
+        if path in self.store:
+            return {"name": path, "size": len(self.store[path]), "type": "file"}
+
+        if any(key.startswith(f"{path}/") for key in self.store):
+            return {"name": path, "size": 0, "type": "directory"}
+
+        raise FileNotFoundError(path)
+
+    async def _cat_file(self, path, start=None, end=None, **kwargs):
+        self._record_call()
+        await asyncio.sleep(LATENCY_SECONDS)
+        return self.store[self._strip_protocol(path)][start:end]
+
+    async def _pipe_file(self, path, value, mode="overwrite", **kwargs):
+        self._record_call()
+        self.store[self._strip_protocol(path)] = value
+
+    async def _makedirs(self, path, exist_ok=False):
+        self._record_call()
+
+
+fsspec.register_implementation("slowmemory", SlowMemoryFileSystem, clobber=True)
+fsspec.register_implementation(
+    "slowasyncmemory", SlowAsyncMemoryFileSystem, clobber=True
+)
+
+
+@pytest.fixture()
+def slow_fs():
+    return FsspecFileSystem(basepath=f"slowmemory://{uuid4().hex}")
+
+
+async def test_read_path_does_not_block_event_loop(slow_fs: FsspecFileSystem):
+    paths = [f"file_{i}.json" for i in range(8)]
+
+    for path in paths:
+        await slow_fs.write_path(path, path.encode())
+
+    start = time.perf_counter()
+    contents = await asyncio.gather(*(slow_fs.read_path(path) for path in paths))
+    elapsed = time.perf_counter() - start
+
+    assert contents == [path.encode() for path in paths]
+
+    # Reads run concurrently, so the batch takes far less than the serial latency
+    assert elapsed < LATENCY_SECONDS * len(paths) / 2
+
+
+async def test_read_path_missing_file(slow_fs: FsspecFileSystem):
+    with pytest.raises(ValueError):
+        await slow_fs.read_path("missing.json")
+
+
+async def test_move_and_delete_path(slow_fs: FsspecFileSystem):
+    await slow_fs.write_path("source/data.json", b"{}")
+
+    await slow_fs.move_path("source/data.json", "dest/data.json")
+    assert not slow_fs.exists("source/data.json")
+    assert await slow_fs.read_path("dest/data.json") == b"{}"
+
+    await slow_fs.delete_path("dest", recursive=True)
+    assert not slow_fs.exists("dest/data.json")
+
+    # Deleting a missing path is a no-op
+    await slow_fs.delete_path("dest", recursive=True)
+
+
+async def test_write_path_pipes_without_tempfile(slow_fs: FsspecFileSystem, monkeypatch):
+    def fail_temp_file(content: bytes) -> str:
+        raise AssertionError("write_path should not use a temporary file")
+
+    monkeypatch.setattr(slow_fs, "_write_temp_file", fail_temp_file)
+
+    await slow_fs.write_path("small.json", b'{"small": true}')
+    assert await slow_fs.read_path("small.json") == b'{"small": true}'
+
+
+async def test_write_path_streams_large_payloads(slow_fs: FsspecFileSystem, monkeypatch):
+    from mad_prefect import filesystems as mad_filesystems
+
+    monkeypatch.setattr(mad_filesystems, "FILESYSTEM_STREAMING_WRITE_THRESHOLD", 10)
+    monkeypatch.setattr(mad_filesystems, "FILESYSTEM_STREAMING_WRITE_CHUNK_SIZE", 4)
+
+    content = b"0123456789" * 5
+    await slow_fs.write_path("large.bin", content)
+    assert await slow_fs.read_path("large.bin") == content
+
+
+async def test_write_path_uses_tempfile_for_configured_protocols(
+    slow_fs: FsspecFileSystem, monkeypatch
+):
+    from mad_prefect import filesystems as mad_filesystems
+
+    monkeypatch.setattr(mad_filesystems, "FILESYSTEM_TEMPFILE_PROTOCOLS", {"slowmemory"})
+    monkeypatch.setattr(mad_filesystems, "_write_strategies", {})
+
+    temp_files: list[str] = []
+    write_temp_file = slow_fs._write_temp_file
+
+    def record_temp_file(content: bytes) -> str:
+        temp_files.append(write_temp_file(content))
+        return temp_files[-1]
+
+    monkeypatch.setattr(slow_fs, "_write_temp_file", record_temp_file)
+
+    await slow_fs.write_path("via_tempfile.json", b"{}")
+
+    assert len(temp_files) == 1
+    assert await slow_fs.read_path("via_tempfile.json") == b"{}"
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+async def test_async_backends_use_native_coroutines(asynchronous: bool):
+    SlowAsyncMemoryFileSystem.call_threads = set()
+    fs = FsspecFileSystem(
+        basepath=f"slowasyncmemory://{uuid4().hex}",
+        storage_options={"asynchronous": asynchronous},
+    )
+    paths = [f"file_{i}.json" for i in range(8)]
+
+    for path in paths:
+        await fs.write_path(path, path.encode())
+
+    start = time.perf_counter()
+    contents = await asyncio.gather(*(fs.read_path(path) for path in paths))
+    elapsed = time.perf_counter() - start
+
+    assert contents == [path.encode() for path in paths]
+    assert elapsed < LATENCY_SECONDS * len(paths) / 2
+
+    with pytest.raises(ValueError):
+        await fs.read_path("missing.json")
+
+    # Filesystems bound to the running loop are awaited directly, all others run
+    # on fsspec's IO loop thread; neither path goes through a worker thread
+    expected_thread = (
+        threading.get_ident()
+        if asynchronous
+        else fsspec.asyn.iothread[0].ident
+    )
+    assert SlowAsyncMemoryFileSystem.call_threads == {expected_thread}